@@ -0,0 +1,165 @@
+"""
+Двухуровневый кэш: маленький LRU в памяти процесса перед общим кэшем.
+
+Чтения сначала идут в локальный LRU с коротким TTL, при промахе — в общий
+кэш (CACHES['default']), и результат запоминается локально. Записи и
+удаления уходят в общий кэш сразу и обновляют локальную копию текущего
+процесса; другие процессы увидят изменение не позже LOCAL_TIMEOUT.
+Поэтому через этот кэш стоит читать значения под ключами с версией
+(posts.cache.get_version): новая версия — новый ключ, устаревших копий
+под ним нет.
+"""
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+from core import metrics
+
+STATS_FLUSH_INTERVAL = 10
+# у каждого процесса своя копия: сброс ключа не виден другим воркерам
+PROCESS_LOCAL_BACKENDS = (LocMemCache, DummyCache)
+
+
+def is_shared(alias='default'):
+    """Видят ли все воркеры одно и то же содержимое кэша alias."""
+    return not isinstance(caches[alias], PROCESS_LOCAL_BACKENDS)
+
+
+class LocalLRU:
+    """LRU с TTL и счётчиками попаданий, общий для всех потоков процесса."""
+
+    def __init__(self, timeout, max_entries):
+        self.timeout = timeout
+        self.max_entries = max_entries
+        self.data = OrderedDict()
+        self.lock = threading.Lock()
+        self.stats = Counter()
+        self.stats_flushed_at = time.monotonic()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self.data[key]
+                return None
+            self.data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self.lock:
+            self.data[key] = (time.monotonic() + self.timeout, value)
+            self.data.move_to_end(key)
+            while len(self.data) > self.max_entries:
+                self.data.popitem(last=False)
+
+    def delete(self, key):
+        with self.lock:
+            self.data.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.data.clear()
+
+    def count(self, tier):
+        with self.lock:
+            self.stats[tier] += 1
+            if time.monotonic() - self.stats_flushed_at < STATS_FLUSH_INTERVAL:
+                return
+            stats, self.stats = self.stats, Counter()
+            self.stats_flushed_at = time.monotonic()
+        # в общие core.metrics счётчики уходят пачкой, а не на каждое чтение
+        for name, value in stats.items():
+            metrics.incr(f'tiered_cache_{name}', value)
+
+    def hit_rates(self):
+        """Доли попаданий по уровням с последней отправки в metrics."""
+        with self.lock:
+            total = sum(self.stats.values()) or 1
+            return {name: value / total for name, value in self.stats.items()}
+
+
+# caches[alias] создаёт бэкенд на каждый поток, а LRU нужен один на процесс
+_local_stores = {}
+_local_stores_lock = threading.Lock()
+
+
+class TieredCache(BaseCache):
+    """
+    Бэкенд для CACHES. Параметры в OPTIONS:
+    SHARED_ALIAS — алиас общего кэша, LOCAL_TIMEOUT — TTL локальной копии
+    в секундах, MAX_ENTRIES — размер LRU.
+    """
+
+    def __init__(self, location, params):
+        options = params.get('OPTIONS', {})
+        super().__init__(params)
+        self.shared_alias = options.get('SHARED_ALIAS', 'default')
+        with _local_stores_lock:
+            if location not in _local_stores:
+                _local_stores[location] = LocalLRU(
+                    options.get('LOCAL_TIMEOUT', 5),
+                    options.get('MAX_ENTRIES', 1000),
+                )
+            self.local = _local_stores[location]
+
+    @property
+    def shared(self):
+        return caches[self.shared_alias]
+
+    def hit_rates(self):
+        return self.local.hit_rates()
+
+    def get(self, key, default=None, version=None):
+        local_key = (key, version)
+        value = self.local.get(local_key)
+        if value is not None:
+            self.local.count('local_hit')
+            return value
+        value = self.shared.get(key, version=version)
+        if value is None:
+            self.local.count('miss')
+            return default
+        self.local.count('shared_hit')
+        self.local.set(local_key, value)
+        return value
+
+    def get_many(self, keys, version=None):
+        return {
+            key: value for key, value in (
+                (key, self.get(key, version=version)) for key in keys
+            ) if value is not None
+        }
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.shared.set(key, value, timeout, version=version)
+        self.local.set((key, version), value)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        added = self.shared.add(key, value, timeout, version=version)
+        if added:
+            self.local.set((key, version), value)
+        return added
+
+    def incr(self, key, delta=1, version=None):
+        value = self.shared.incr(key, delta, version=version)
+        self.local.set((key, version), value)
+        return value
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.shared.touch(key, timeout, version=version)
+
+    def delete(self, key, version=None):
+        self.shared.delete(key, version=version)
+        self.local.delete((key, version))
+
+    def clear(self):
+        self.shared.clear()
+        self.local.clear()
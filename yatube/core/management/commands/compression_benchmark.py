@@ -0,0 +1,51 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+
+from core.middleware.compression import (BROTLI_QUALITY, GZIP_LEVEL,
+                                         BrotliCompressor, GzipCompressor,
+                                         brotli)
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает затраты CPU и экономию байтов при сжатии страниц '
+        'gzip и brotli на разных уровнях.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('urls', nargs='*', default=['/'])
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        client = Client()
+        for url in options['urls']:
+            response = client.get(url)
+            if response.status_code != 200 or response.streaming:
+                raise CommandError(f'{url}: ответ {response.status_code}')
+            self.report(url, response.content, options['repeat'])
+
+    def codecs(self):
+        for level in sorted({1, GZIP_LEVEL, 9}):
+            yield f'gzip-{level}', lambda level=level: GzipCompressor(level)
+        if brotli is None:
+            return
+        for quality in sorted({1, BROTLI_QUALITY, 11}):
+            yield f'br-{quality}', (
+                lambda quality=quality: BrotliCompressor(quality)
+            )
+
+    def report(self, url, content, repeat):
+        self.stdout.write(f'{url}: {len(content)} байт без сжатия')
+        for name, factory in self.codecs():
+            started = time.perf_counter()
+            for _ in range(repeat):
+                compressor = factory()
+                size = len(compressor.compress(content) + compressor.finish())
+            elapsed = (time.perf_counter() - started) / repeat
+            self.stdout.write(
+                f'  {name:>8}: {size:>8} байт '
+                f'({100 * (1 - size / len(content)):5.1f}% экономии), '
+                f'{elapsed * 1000:7.3f} мс на ответ'
+            )
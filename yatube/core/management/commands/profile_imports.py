@@ -0,0 +1,141 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# что считается стартом: воркер gunicorn/uwsgi или manage.py с самой
+# лёгкой командой
+BOOT = {
+    'wsgi': 'from yatube.wsgi import application',
+    'manage': (
+        "import manage; sys.argv = ['manage.py', 'version']; manage.main()"
+    ),
+}
+# эти модули нужны только админке, картинкам или тестам и при старте
+# загружаться не должны
+DEFERRED_MODULES = (
+    'PIL',
+    'django.test',
+    'posts.admin',
+    'posts.bulk',
+    'users.admin',
+    'sorl.thumbnail.admin',
+    'sorl.thumbnail.templatetags',
+)
+# дорогие импорты, которые не убрать из кода проекта
+HINTS = (
+    ('setuptools', (
+        'Django 2.2 импортирует distutils, а подмена от setuptools тянет '
+        'весь setuptools: запускайте воркеры с SETUPTOOLS_USE_DISTUTILS='
+        'stdlib (в самом процессе выставлять уже поздно)'
+    )),
+    ('pkg_resources', (
+        'pkg_resources импортирует пакет sorl ради номера своей версии; '
+        'это цена sorl.thumbnail в INSTALLED_APPS'
+    )),
+)
+PROBE = '''
+import json, sys, time
+started = time.perf_counter()
+{boot}
+elapsed = time.perf_counter() - started
+print(json.dumps({{
+    'ms': elapsed * 1000,
+    'deferred': sorted(
+        name for name in sys.modules
+        if any(
+            name == module or name.startswith(module + '.')
+            for module in {deferred!r}
+        )
+    ),
+}}))
+'''
+
+
+def parse_importtime(output):
+    """Строки -X importtime в (модуль, собственное мкс, суммарное мкс)."""
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        own, cumulative, name = line[len('import time:'):].split('|')
+        yield name.strip(), int(own), int(cumulative)
+
+
+def boot(script, *flags):
+    """Запускает script в чистом интерпретаторе: (итог PROBE, stderr)."""
+    # настройки выберет сам wsgi.py или manage.py, как в свежем процессе
+    env = {
+        name: value for name, value in os.environ.items()
+        if name != 'DJANGO_SETTINGS_MODULE'
+    }
+    completed = subprocess.run(
+        [sys.executable, *flags, '-c', script],
+        cwd=settings.BASE_DIR, env=env,
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+        universal_newlines=True,
+    )
+    if completed.returncode:
+        raise CommandError(completed.stderr)
+    return json.loads(completed.stdout.splitlines()[-1]), completed.stderr
+
+
+class Command(BaseCommand):
+    help = (
+        'Показывает самые дорогие импорты при старте воркера (wsgi) или '
+        'manage.py (manage) и замеряет время старта. С --check падает, '
+        'если старт дольше --budget или загрузились отложенные модули.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--target', choices=BOOT, default='wsgi')
+        parser.add_argument('--top', type=int, default=25)
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--budget', type=float, default=1000,
+                            help='Допустимая медиана старта, мс.')
+        parser.add_argument('--check', action='store_true')
+
+    def handle(self, *args, **options):
+        script = PROBE.format(
+            boot=BOOT[options['target']],
+            deferred=DEFERRED_MODULES,
+        )
+        if options['top']:
+            self.report_imports(script, options['top'])
+        runs = [boot(script)[0] for _ in range(options['repeat'])]
+        median = statistics.median(run['ms'] for run in runs)
+        self.stdout.write(
+            f'Старт ({options["target"]}): медиана {median:.0f} мс, '
+            f'минимум {min(run["ms"] for run in runs):.0f} мс '
+            f'за {len(runs)} запусков'
+        )
+        deferred = runs[0]['deferred']
+        if deferred:
+            self.stderr.write(
+                'При старте загружены отложенные модули: '
+                + ', '.join(deferred)
+            )
+        if options['check'] and (deferred or median > options['budget']):
+            raise CommandError(
+                f'Старт не укладывается в бюджет {options["budget"]:.0f} мс '
+                'или тянет отложенные модули'
+            )
+
+    def report_imports(self, script, top):
+        _, importtime = boot(script, '-X', 'importtime')
+        imports = sorted(
+            parse_importtime(importtime),
+            key=lambda row: row[2], reverse=True,
+        )
+        self.stdout.write(f'{"суммарно, мс":>13} {"своё, мс":>9}  модуль')
+        for name, own, cumulative in imports[:top]:
+            self.stdout.write(
+                f'{cumulative / 1000:13.1f} {own / 1000:9.1f}  {name}'
+            )
+        loaded = {name for name, _, _ in imports}
+        for module, hint in HINTS:
+            if module in loaded:
+                self.stderr.write(hint)
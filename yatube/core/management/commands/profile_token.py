@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from core.middleware.profiler import MODES, TOKEN_MAX_AGE, make_token
+
+
+class Command(BaseCommand):
+    help = (
+        'Выдаёт подписанный токен для заголовка X-Profile: запрос с ним '
+        'профилируется независимо от PROFILER_SAMPLE_RATE.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--mode', choices=MODES, default='cprofile')
+
+    def handle(self, *args, **options):
+        self.stdout.write(make_token(options['mode']))
+        self.stderr.write(f'Токен действует {TOKEN_MAX_AGE // 60} минут')
@@ -0,0 +1,128 @@
+import mimetypes
+import os
+import posixpath
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import (FileResponse, Http404, HttpResponse,
+                         HttpResponseNotModified, StreamingHttpResponse)
+from django.utils._os import safe_join
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+CHUNK_SIZE = 64 * 1024
+
+
+def parse_range(header: str, size: int):
+    """
+    Разбирает одиночный диапазон Range: bytes=start-end.
+    Возвращает (start, end) включительно, None — если заголовка нет или он
+    не поддерживается (отдаём файл целиком), и False, если диапазон
+    не попадает в файл.
+    """
+    match = RANGE_RE.match(header.strip())
+    if not match or match.groups() == ('', ''):
+        return None
+    start, end = match.groups()
+    if start == '':
+        # bytes=-500 — последние 500 байт
+        start, end = max(size - int(end), 0), size - 1
+    else:
+        start = int(start)
+        end = min(int(end), size - 1) if end else size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+def iter_range(path, start, length):
+    with open(path, 'rb') as source:
+        source.seek(start)
+        while length > 0:
+            data = source.read(min(CHUNK_SIZE, length))
+            if not data:
+                break
+            length -= len(data)
+            yield data
+
+
+def accel_response(path, fullpath, content_type):
+    """Передаёт отдачу файла фронтовому серверу."""
+    response = HttpResponse(content_type=content_type)
+    header = settings.MEDIA_SENDFILE_HEADER
+    if header == 'X-Accel-Redirect':
+        response[header] = settings.MEDIA_ACCEL_PREFIX + quote(path)
+    else:
+        response[header] = fullpath
+    return response
+
+
+def range_response(request, fullpath, size, content_type):
+    byte_range = parse_range(request.META.get('HTTP_RANGE', ''), size)
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+    if byte_range is None:
+        # без Range сервер отдаёт файл через wsgi.file_wrapper (sendfile)
+        return FileResponse(open(fullpath, 'rb'), content_type=content_type)
+    start, end = byte_range
+    response = StreamingHttpResponse(
+        iter_range(fullpath, start, end - start + 1),
+        status=206,
+        content_type=content_type,
+    )
+    response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    response['Content-Length'] = str(end - start + 1)
+    return response
+
+
+def clean_path(path):
+    """
+    Нормализованный путь внутри MEDIA_ROOT. Путь с '..' — 404: права
+    проверяются по имени файла, и cache/../x не должен их обойти.
+    """
+    if '..' in path.split('/'):
+        raise Http404
+    path = posixpath.normpath(path).lstrip('/')
+    if path in ('', '.'):
+        raise Http404
+    return path
+
+
+def send_file(request, path):
+    """
+    Отдаёт файл из MEDIA_ROOT. Если за Django стоит nginx или apache
+    (MEDIA_SENDFILE_HEADER), Django только проверяет доступ, а сами байты
+    отдаёт фронтовой сервер; иначе — FileResponse с поддержкой Range.
+    Права на файл проверяет вызывающая вьюха — по пути из clean_path.
+    """
+    path = clean_path(path)
+    try:
+        fullpath = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404
+    if not os.path.isfile(fullpath):
+        raise Http404
+    stat = os.stat(fullpath)
+    if not was_modified_since(
+        request.META.get('HTTP_IF_MODIFIED_SINCE'),
+        stat.st_mtime,
+        stat.st_size
+    ):
+        return HttpResponseNotModified()
+    content_type = (
+        mimetypes.guess_type(fullpath)[0] or 'application/octet-stream'
+    )
+    if settings.MEDIA_SENDFILE_HEADER:
+        response = accel_response(path, fullpath, content_type)
+    else:
+        response = range_response(
+            request, fullpath, stat.st_size, content_type
+        )
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    response['Accept-Ranges'] = 'bytes'
+    return response
@@ -0,0 +1,85 @@
+"""
+Счётчики для мониторинга. Хранятся в общем кэше, поэтому видны
+со всех воркеров; отдаются вьюхой core.views.metrics.
+
+Счётчик с метками (incr('template_renders', template='...')) — отдельный
+ряд того же счётчика. Значение метки может быть любой строкой, поэтому
+ключ кэша строится по её md5.
+
+Список рядов для snapshot — слоты metrics:series:<n>: воркер, создавший
+ряд, занимает следующий номер через incr и пишет ряд в свой слот. add и
+incr атомарны и в memcached, поэтому ряды, созданные одновременно, не
+затирают друг друга, как затирали бы общий список (get, затем set).
+"""
+import hashlib
+
+from django.core.cache import cache
+
+KEY_PREFIX = 'metrics:'
+SLOTS_KEY = KEY_PREFIX + 'series'
+
+
+def series_key(name, labels):
+    if not labels:
+        return KEY_PREFIX + name
+    digest = hashlib.md5(repr(labels).encode()).hexdigest()
+    return f'{KEY_PREFIX}{name}:{digest}'
+
+
+def slot_key(number):
+    return f'{SLOTS_KEY}:{number}'
+
+
+def incr(name: str, delta: int = 1, **labels) -> None:
+    series = (name, tuple(sorted(labels.items())))
+    key = series_key(*series)
+    if cache.add(key, delta, None):
+        register(series)
+        return
+    try:
+        cache.incr(key, delta)
+    except ValueError:
+        # ключ вытеснили между add и incr
+        cache.set(key, delta, None)
+
+
+def register(series):
+    """Пишет новый ряд в свой слот."""
+    while True:
+        cache.add(SLOTS_KEY, 0, None)
+        try:
+            number = cache.incr(SLOTS_KEY)
+        except ValueError:
+            # счётчик слотов вытеснили между add и incr
+            continue
+        cache.set(slot_key(number), series, None)
+        return
+
+
+def all_series():
+    count = cache.get(SLOTS_KEY, 0)
+    slots = cache.get_many([slot_key(n) for n in range(1, count + 1)])
+    # после вытеснения счётчика ряд может оказаться в двух слотах
+    return sorted(set(slots.values()))
+
+
+def values(series):
+    found = cache.get_many([series_key(*item) for item in series])
+    return {item: found.get(series_key(*item), 0) for item in series}
+
+
+def snapshot() -> dict:
+    """{имя: значение} рядов без меток."""
+    return {
+        name: value
+        for (name, labels), value in values(all_series()).items()
+        if not labels
+    }
+
+
+def labelled_snapshot() -> dict:
+    """{(имя, ((метка, значение), ...)): значение} рядов с метками."""
+    return {
+        item: value for item, value in values(all_series()).items()
+        if item[1]
+    }
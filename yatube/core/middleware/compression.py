@@ -0,0 +1,134 @@
+import zlib
+
+from django.utils.cache import patch_vary_headers
+
+from core.static import accepted_encodings
+
+try:
+    import brotli
+except ImportError:  # без brotli сжимаем только gzip
+    brotli = None
+
+MIN_COMPRESS_SIZE = 512
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+COMPRESSIBLE_TYPES = (
+    'text/',
+    'application/json',
+    'application/javascript',
+    'application/xml',
+    'application/atom+xml',
+    'application/rss+xml',
+    'image/svg+xml',
+)
+
+
+class GzipCompressor:
+    """Потоковый gzip поверх zlib: compress() для кусков, finish() в конце."""
+
+    def __init__(self, level=GZIP_LEVEL):
+        # wbits 16 + MAX_WBITS — заголовок и хвост gzip, а не голый deflate
+        self.compressor = zlib.compressobj(
+            level, zlib.DEFLATED, 16 + zlib.MAX_WBITS
+        )
+
+    def compress(self, data):
+        return self.compressor.compress(data)
+
+    def finish(self):
+        return self.compressor.flush()
+
+
+class BrotliCompressor:
+    def __init__(self, quality=BROTLI_QUALITY):
+        self.compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data):
+        return self.compressor.process(data)
+
+    def finish(self):
+        return self.compressor.finish()
+
+
+COMPRESSORS = {'gzip': GzipCompressor}
+if brotli is not None:
+    COMPRESSORS['br'] = BrotliCompressor
+# порядок предпочтения при согласовании
+PREFERRED_ENCODINGS = ('br', 'gzip')
+
+
+def compress_bytes(content, encoding):
+    compressor = COMPRESSORS[encoding]()
+    return compressor.compress(content) + compressor.finish()
+
+
+def compress_stream(chunks, encoding):
+    """Сжимает поток по кускам, не собирая тело ответа в памяти."""
+    compressor = COMPRESSORS[encoding]()
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+def negotiate_encoding(request):
+    accepted = accepted_encodings(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+    for encoding in PREFERRED_ENCODINGS:
+        if encoding in COMPRESSORS and encoding in accepted:
+            return encoding
+    return None
+
+
+def is_compressible(response):
+    if response.has_header('Content-Encoding'):
+        return False
+    # смещения диапазона считаются по несжатому телу
+    if response.status_code == 206 or response.has_header('Content-Range'):
+        return False
+    content_type = response.get('Content-Type', '').lower()
+    if not content_type.startswith(COMPRESSIBLE_TYPES):
+        return False
+    if response.streaming:
+        return True
+    return len(response.content) >= MIN_COMPRESS_SIZE
+
+
+class CompressionMiddleware:
+    """
+    Сжимает HTML/JSON ответы brotli или gzip по Accept-Encoding.
+    StreamingHttpResponse сжимается по кускам; короткие, уже сжатые
+    ответы и медиа (картинки, архивы) пропускаются.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if not is_compressible(response):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = negotiate_encoding(request)
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            response.streaming_content = compress_stream(
+                response.streaming_content, encoding
+            )
+            # итоговый размер станет известен только в конце потока
+            del response['Content-Length']
+        else:
+            compressed = compress_bytes(response.content, encoding)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response['Content-Length'] = str(len(compressed))
+
+        # сильный ETag после сжатия становится слабым (RFC 7232, 2.1)
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = encoding
+        return response
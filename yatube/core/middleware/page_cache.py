@@ -0,0 +1,142 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.module_loading import import_string
+
+from core import metrics
+
+# страница свежая FRESH_TIMEOUT секунд, потом ещё STALE_TIMEOUT
+# отдаётся устаревшей, пока один воркер её перерисовывает
+FRESH_TIMEOUT = 60
+STALE_TIMEOUT = 60 * 10
+LOCK_TIMEOUT = 30
+# сколько ждать чужой перерисовки холодного ключа, прежде чем рисовать самим
+COLD_WAIT_ATTEMPTS = 20
+COLD_WAIT_DELAY = 0.05
+
+
+def get_content_version(view_name, view_kwargs):
+    if not settings.PAGE_CACHE_VERSION:
+        return None
+    return import_string(settings.PAGE_CACHE_VERSION)(view_name, view_kwargs)
+
+
+class AnonymousPageCacheMiddleware:
+    """
+    Кэш целых страниц для анонимных GET-запросов к вьюхам из
+    settings.PAGE_CACHE_VIEWS.
+
+    Запись в кэше хранит версию контента страницы: её возвращает
+    settings.PAGE_CACHE_VERSION(view_name, view_kwargs).
+    Если страница устарела по времени или версии, её перерисовывает
+    только тот запрос, который взял блокировку, остальные сразу получают
+    устаревшую копию. Холодный ключ рисует один воркер, прочие недолго
+    ждут его результата — без лавины одинаковых рендеров.
+    Счётчики page_cache_hit/stale/miss пишутся в core.metrics.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        state = getattr(request, '_page_cache', None)
+        if state is not None:
+            key, version, locked = state
+            try:
+                if self.is_cacheable(response):
+                    self.store(key, version, response)
+            finally:
+                if locked:
+                    cache.delete(key + ':lock')
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if not self.is_cached_request(request):
+            return None
+        path = request.get_full_path().encode()
+        key = 'page_cache:' + hashlib.md5(path).hexdigest()
+        version = get_content_version(
+            request.resolver_match.view_name, view_kwargs
+        )
+        entry = cache.get(key)
+        if self.is_fresh(entry, version):
+            metrics.incr('page_cache_hit')
+            return self.restore(entry)
+        locked = self.acquire(key)
+        if not locked and entry is not None:
+            metrics.incr('page_cache_stale')
+            return self.restore(entry)
+        if not locked:
+            entry = self.wait_for(key)
+            if entry is not None:
+                metrics.incr('page_cache_hit')
+                return self.restore(entry)
+        # этот запрос рисует страницу, __call__ положит её в кэш
+        metrics.incr('page_cache_miss')
+        request._page_cache = (key, version, locked)
+        return None
+
+    @staticmethod
+    def is_cached_request(request):
+        return (
+            request.method == 'GET'
+            and request.resolver_match.view_name in settings.PAGE_CACHE_VIEWS
+            and not request.user.is_authenticated
+        )
+
+    @staticmethod
+    def is_fresh(entry, version):
+        return (
+            entry is not None
+            and entry[0] == version
+            and time.time() < entry[1]
+        )
+
+    @staticmethod
+    def acquire(key):
+        return cache.add(key + ':lock', 1, LOCK_TIMEOUT)
+
+    @staticmethod
+    def wait_for(key):
+        for _ in range(COLD_WAIT_ATTEMPTS):
+            time.sleep(COLD_WAIT_DELAY)
+            entry = cache.get(key)
+            if entry is not None:
+                return entry
+        return None
+
+    @staticmethod
+    def is_cacheable(response):
+        return (
+            response.status_code == 200
+            and not response.streaming
+            and not response.cookies
+            and 'private' not in response.get('Cache-Control', '')
+        )
+
+    @staticmethod
+    def store(key, version, response):
+        headers = [
+            (header, value) for header, value in response.items()
+            if header.lower() not in ('set-cookie', 'content-length')
+        ]
+        entry = (
+            version,
+            time.time() + FRESH_TIMEOUT,
+            response.status_code,
+            headers,
+            response.content,
+        )
+        cache.set(key, entry, FRESH_TIMEOUT + STALE_TIMEOUT)
+
+    @staticmethod
+    def restore(entry):
+        _, _, status, headers, content = entry
+        response = HttpResponse(content, status=status)
+        for header, value in headers:
+            response[header] = value
+        return response
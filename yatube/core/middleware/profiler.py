@@ -0,0 +1,183 @@
+"""
+Профилирование живых запросов по выбору.
+
+Профилируется доля PROFILER_SAMPLE_RATE запросов или запрос с заголовком
+X-Profile, в котором подписанный токен (команда profile_token). Режим
+'cprofile' пишет pstats (.prof), режим 'sampling' раз в
+SAMPLE_INTERVAL снимает стек потока запроса и пишет свёрнутые стеки
+(.folded) для flamegraph.pl или speedscope — это почти не замедляет
+запрос. Рядом с профилем пишется разбивка времени по шаблонам
+(.templates), если стоит TemplateTimingMiddleware. Файлы лежат в
+PROFILER_ROOT/<имя вьюхи>/, в каждом каталоге остаются только последние
+PROFILER_KEEP профилей.
+"""
+import cProfile
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core import signing
+
+from core import metrics
+
+HEADER = 'HTTP_X_PROFILE'
+TOKEN_SALT = 'core.profiler'
+TOKEN_MAX_AGE = 60 * 60
+MODES = ('cprofile', 'sampling')
+SAMPLE_INTERVAL = 0.005
+
+
+def make_token(mode='cprofile'):
+    return signing.dumps({'mode': mode}, salt=TOKEN_SALT)
+
+
+def token_mode(token):
+    """Режим из подписанного токена, None — токен не годится."""
+    try:
+        payload = signing.loads(token, salt=TOKEN_SALT, max_age=TOKEN_MAX_AGE)
+    except signing.BadSignature:
+        return None
+    mode = payload.get('mode') if isinstance(payload, dict) else None
+    return mode if mode in MODES else None
+
+
+class CProfileRecorder:
+    suffix = '.prof'
+
+    def __init__(self):
+        self.profile = cProfile.Profile()
+
+    def start(self):
+        self.profile.enable()
+
+    def stop(self):
+        self.profile.disable()
+
+    def dump(self, path):
+        self.profile.dump_stats(path)
+
+
+class SamplingRecorder:
+    """Снимает стек одного потока из соседнего потока."""
+    suffix = '.folded'
+
+    def __init__(self, interval=SAMPLE_INTERVAL):
+        self.interval = interval
+        self.thread_id = threading.get_ident()
+        self.stacks = Counter()
+        self.stopped = threading.Event()
+        self.sampler = threading.Thread(target=self.run, daemon=True)
+
+    def start(self):
+        self.sampler.start()
+
+    def stop(self):
+        self.stopped.set()
+        self.sampler.join()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(
+                    f'{code.co_name} ({os.path.basename(code.co_filename)})'
+                )
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def dump(self, path):
+        with open(path, 'w', encoding='utf-8') as folded:
+            for stack, count in self.stacks.most_common():
+                folded.write(f'{stack} {count}\n')
+
+
+RECORDERS = {
+    'cprofile': CProfileRecorder,
+    'sampling': SamplingRecorder,
+}
+
+
+def rotate(directory, keep):
+    """Оставляет keep последних профилей вместе с их .templates."""
+    profiles = {}
+    for entry in os.scandir(directory):
+        if entry.is_file():
+            stem = entry.name.split('.', 1)[0]
+            profiles.setdefault(stem, []).append(entry)
+    newest_first = sorted(
+        profiles.values(),
+        key=lambda files: max(entry.stat().st_mtime for entry in files),
+        reverse=True,
+    )
+    for files in newest_first[keep:]:
+        for entry in files:
+            os.remove(entry.path)
+
+
+def dump_template_timings(timings, path):
+    with open(path, 'w', encoding='utf-8') as table:
+        table.write('# шаблон рендеров всего_мс собственное_мс\n')
+        for name, count, total, own in timings.rows():
+            table.write(
+                f'{name} {count} {total * 1000:.2f} {own * 1000:.2f}\n'
+            )
+
+
+class ProfilerMiddleware:
+    """
+    Ставится сразу после SecurityMiddleware: в профиль попадают сессия,
+    авторизация, вьюха и шаблоны. Настройки: PROFILER_SAMPLE_RATE,
+    PROFILER_MODE, PROFILER_ROOT, PROFILER_KEEP.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        mode = self.requested_mode(request)
+        if mode is None:
+            return self.get_response(request)
+        recorder = RECORDERS[mode]()
+        started = time.perf_counter()
+        recorder.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            recorder.stop()
+        self.save(request, recorder, time.perf_counter() - started)
+        return response
+
+    @staticmethod
+    def requested_mode(request):
+        token = request.META.get(HEADER)
+        if token:
+            return token_mode(token)
+        rate = settings.PROFILER_SAMPLE_RATE
+        if rate and random.random() < rate:
+            return settings.PROFILER_MODE
+        return None
+
+    @staticmethod
+    def save(request, recorder, elapsed):
+        match = request.resolver_match
+        view_name = match.view_name if match else 'unresolved'
+        directory = os.path.join(
+            settings.PROFILER_ROOT, view_name.replace(':', '.')
+        )
+        os.makedirs(directory, exist_ok=True)
+        stem = os.path.join(directory, '{}-{}-{:.0f}ms'.format(
+            time.strftime('%Y%m%d-%H%M%S'), os.getpid(), elapsed * 1000,
+        ))
+        recorder.dump(stem + recorder.suffix)
+        timings = getattr(request, 'template_timings', None)
+        if timings is not None:
+            dump_template_timings(timings, stem + '.templates')
+        rotate(directory, settings.PROFILER_KEEP)
+        metrics.incr('profiled_requests')
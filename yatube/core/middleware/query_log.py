@@ -0,0 +1,121 @@
+"""
+Журнал медленных запросов к БД и поиск N+1.
+
+Каждый SQL-запрос внутри HTTP-запроса проходит через execute_wrapper.
+Запрос дольше SLOW_QUERY_THRESHOLD секунд пишется в лог 'core.sql' с
+текстом, временем, именем вьюхи и сжатым стеком: строки кода проекта и
+строки шаблонов, из которых он пришёл (например, post.author.posts.count
+в post_detail.html). Одинаковый SQL (без учёта параметров), выполненный
+за запрос N_PLUS_ONE_THRESHOLD раз и больше, — вероятный N+1: о нём
+пишется одно предупреждение со стеком того вызова, на котором сработал
+порог. Стек снимается только в этих двух случаях, обычные запросы
+стоят одного замера времени.
+"""
+import logging
+import os
+import sys
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+import django
+from django.conf import settings
+from django.db import connections
+from django.template.base import Node, TokenType
+
+from core import metrics
+
+logger = logging.getLogger('core.sql')
+
+STACK_DEPTH = 12
+# кадры Django, библиотек, stdlib и middleware в стек не попадают,
+# из рендера шаблона берётся только текущий тег
+_RENDER_CODE = Node.render_annotated.__code__
+_SKIP_DIRS = tuple(
+    os.path.dirname(path) + os.sep
+    for path in (django.__file__, os.__file__, __file__)
+) + (os.sep + 'site-packages' + os.sep,)
+
+
+def condensed_stack(frame):
+    """Строки проекта и шаблонов от вызова запроса наружу."""
+    lines = []
+    while frame is not None and len(lines) < STACK_DEPTH:
+        code = frame.f_code
+        if code is _RENDER_CODE:
+            node = frame.f_locals.get('self')
+            origin = getattr(node, 'origin', None)
+            if origin is not None and node.token is not None:
+                token = node.token
+                tag = '{{ %s }}' if token.token_type == TokenType.VAR else (
+                    '{%% %s %%}'
+                )
+                lines.append(
+                    f'{origin.template_name}:{token.lineno} '
+                    + tag % token.contents
+                )
+        elif not code.co_filename.startswith(_SKIP_DIRS):
+            lines.append(
+                f'{os.path.relpath(code.co_filename, settings.BASE_DIR)}:'
+                f'{frame.f_lineno} {code.co_name}'
+            )
+        frame = frame.f_back
+    return lines
+
+
+class QueryRecorder:
+    """execute_wrapper одного HTTP-запроса."""
+
+    def __init__(self, request):
+        self.request = request
+        self.counts = Counter()
+
+    @property
+    def view_name(self):
+        match = self.request.resolver_match
+        return match.view_name if match else 'unresolved'
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            self.counts[sql] += 1
+            if duration >= settings.SLOW_QUERY_THRESHOLD:
+                self.log_slow(sql, duration)
+            if self.counts[sql] == settings.N_PLUS_ONE_THRESHOLD:
+                self.log_repeated(sql)
+
+    def log_slow(self, sql, duration):
+        metrics.incr('slow_queries')
+        logger.warning(
+            'Медленный запрос %.0f мс во вьюхе %s: %s\n  %s',
+            duration * 1000, self.view_name, sql,
+            '\n  '.join(condensed_stack(sys._getframe(2))),
+        )
+
+    def log_repeated(self, sql):
+        metrics.incr('repeated_queries')
+        logger.warning(
+            'Запрос повторяется %d раз во вьюхе %s (N+1?): %s\n  %s',
+            settings.N_PLUS_ONE_THRESHOLD, self.view_name, sql,
+            '\n  '.join(condensed_stack(sys._getframe(2))),
+        )
+
+
+class QueryLogMiddleware:
+    """
+    Оборачивает все подключения к БД на время запроса. Настройки:
+    SLOW_QUERY_THRESHOLD (секунды) и N_PLUS_ONE_THRESHOLD (повторов).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        recorder = QueryRecorder(request)
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            return self.get_response(request)
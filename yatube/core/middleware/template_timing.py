@@ -0,0 +1,19 @@
+from core import template_timing
+
+
+class TemplateTimingMiddleware:
+    """
+    Замеряет рендер шаблонов запроса (см. core.template_timing) и кладёт
+    итоги в request.template_timings.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        template_timing.install()
+
+    def __call__(self, request):
+        template_timing.start()
+        try:
+            return self.get_response(request)
+        finally:
+            request.template_timings = template_timing.stop()
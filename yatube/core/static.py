@@ -0,0 +1,129 @@
+import json
+import mimetypes
+import os
+from email.utils import formatdate
+from wsgiref.util import FileWrapper
+
+from django.conf import settings
+
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+DEFAULT_CACHE_CONTROL = 'public, max-age=60'
+# в порядке предпочтения: brotli плотнее gzip
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def accepted_encodings(header: str) -> set:
+    """Кодировки из Accept-Encoding, которые клиент не запретил через q=0."""
+    accepted = set()
+    for item in header.split(','):
+        coding, _, params = item.strip().partition(';')
+        quality = params.strip()
+        if quality.startswith('q='):
+            try:
+                if float(quality[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(coding.strip().lower())
+    return accepted
+
+
+class StaticAsset:
+    """Файл статики и его сжатые копии, найденные при старте воркера."""
+    __slots__ = ('path', 'content_type', 'cache_control', 'variants')
+
+    def __init__(self, path, immutable):
+        self.path = path
+        self.content_type = (
+            mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        )
+        self.cache_control = (
+            IMMUTABLE_CACHE_CONTROL if immutable else DEFAULT_CACHE_CONTROL
+        )
+        self.variants = {None: self.stat(path)}
+        for encoding, suffix in ENCODINGS:
+            if os.path.isfile(path + suffix):
+                self.variants[encoding] = self.stat(path + suffix)
+
+    @staticmethod
+    def stat(path):
+        stat = os.stat(path)
+        etag = f'"{stat.st_size:x}-{int(stat.st_mtime):x}"'
+        return path, stat.st_size, formatdate(stat.st_mtime, usegmt=True), etag
+
+    def negotiate(self, accept_encoding):
+        accepted = accepted_encodings(accept_encoding)
+        for encoding, _ in ENCODINGS:
+            if encoding in self.variants and encoding in accepted:
+                return encoding
+        return None
+
+
+class StaticAssetsHandler:
+    """
+    WSGI-обёртка, которая сама отдаёт собранную collectstatic статику:
+    хешированные файлы — с immutable Cache-Control, сжатые копии —
+    по Accept-Encoding. Остальные запросы уходят в Django.
+    """
+
+    def __init__(self, application, root=None, prefix=None):
+        self.application = application
+        self.root = root or settings.STATIC_ROOT
+        self.prefix = prefix or settings.STATIC_URL
+        self.assets = self.scan()
+
+    def scan(self):
+        assets = {}
+        if not self.root or not os.path.isdir(self.root):
+            return assets
+        hashed = self.hashed_names()
+        for directory, _, files in os.walk(self.root):
+            for filename in files:
+                if filename.endswith(('.gz', '.br')):
+                    continue
+                path = os.path.join(directory, filename)
+                name = os.path.relpath(path, self.root).replace(os.sep, '/')
+                assets[name] = StaticAsset(path, name in hashed)
+        return assets
+
+    def hashed_names(self):
+        manifest = os.path.join(self.root, 'staticfiles.json')
+        try:
+            with open(manifest) as source:
+                return set(json.load(source).get('paths', {}).values())
+        except (OSError, ValueError):
+            return set()
+
+    def __call__(self, environ, start_response):
+        path = environ.get('PATH_INFO', '')
+        if (
+            environ.get('REQUEST_METHOD') in ('GET', 'HEAD')
+            and path.startswith(self.prefix)
+        ):
+            asset = self.assets.get(path[len(self.prefix):])
+            if asset is not None:
+                return self.serve(asset, environ, start_response)
+        return self.application(environ, start_response)
+
+    def serve(self, asset, environ, start_response):
+        encoding = asset.negotiate(environ.get('HTTP_ACCEPT_ENCODING', ''))
+        path, size, last_modified, etag = asset.variants[encoding]
+        headers = [
+            ('Content-Type', asset.content_type),
+            ('Cache-Control', asset.cache_control),
+            ('Last-Modified', last_modified),
+            ('ETag', etag),
+        ]
+        if len(asset.variants) > 1:
+            headers.append(('Vary', 'Accept-Encoding'))
+        if environ.get('HTTP_IF_NONE_MATCH') == etag:
+            start_response('304 Not Modified', headers)
+            return []
+        if encoding:
+            headers.append(('Content-Encoding', encoding))
+        headers.append(('Content-Length', str(size)))
+        start_response('200 OK', headers)
+        if environ['REQUEST_METHOD'] == 'HEAD':
+            return []
+        file_wrapper = environ.get('wsgi.file_wrapper', FileWrapper)
+        return file_wrapper(open(path, 'rb'))
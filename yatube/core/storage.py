@@ -0,0 +1,77 @@
+import gzip
+import os
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+try:
+    import brotli
+except ImportError:  # brotli не обязателен, без него собираем только .gz
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = (
+    '.css', '.js', '.svg', '.txt', '.html', '.xml', '.json', '.map', '.ico',
+)
+MIN_COMPRESS_SIZE = 256
+
+
+def compress_gzip(content: bytes) -> bytes:
+    # mtime=0, чтобы одинаковый файл давал одинаковый архив
+    return gzip.compress(content, compresslevel=9, mtime=0)
+
+
+def compress_brotli(content: bytes) -> bytes:
+    return brotli.compress(content, quality=11)
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    Хранилище статики: к хешированным именам из ManifestStaticFilesStorage
+    при collectstatic добавляет сжатые копии .gz и .br рядом с файлом.
+    """
+    compressors = (
+        ('.gz', compress_gzip),
+    ) + ((('.br', compress_brotli),) if brotli else ())
+
+    @property
+    def manifest_strict(self):
+        # в проде файл без записи в манифесте — ошибка сборки, а не
+        # URL без хеша с вечным Cache-Control
+        return settings.STATIC_MANIFEST_STRICT
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            if self.manifest_strict:
+                raise
+            # collectstatic в dev и тестах не запускается —
+            # отдаём исходное имя вместо падения шаблона
+            return name
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        names = set(paths) | set(self.hashed_files.values())
+        for name in sorted(names):
+            if name.endswith(COMPRESSIBLE_EXTENSIONS):
+                self.compress(name)
+
+    def compress(self, name):
+        path = self.path(name)
+        with open(path, 'rb') as source:
+            content = source.read()
+        if len(content) < MIN_COMPRESS_SIZE:
+            return
+        for suffix, compressor in self.compressors:
+            compressed = compressor(content)
+            # сжатая копия, которая не меньше оригинала, бесполезна;
+            # старую копию от прошлой сборки тоже убираем
+            if len(compressed) >= len(content):
+                if os.path.exists(path + suffix):
+                    os.remove(path + suffix)
+                continue
+            with open(path + suffix, 'wb') as target:
+                target.write(compressed)
+            os.utime(path + suffix, (os.stat(path).st_mtime,) * 2)
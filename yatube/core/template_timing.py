@@ -0,0 +1,134 @@
+"""
+Время рендера шаблонов с разбивкой по include.
+
+install() подменяет Template._render: через него проходит каждый шаблон
+запроса — сам шаблон вьюхи, родитель из {% extends %} и каждый
+{% include %}. Так же замеряется {% thumbnail %} в карточках. Пока в
+потоке идёт замер (core.middleware.template_timing), для каждого имени
+копятся число рендеров, полное время и собственное время без вложенных
+шаблонов: именно собственное время показывает, какой include дорогой.
+
+Итоги запроса отдаются в request.template_timings (их пишет профилировщик)
+и копятся в счётчики процесса, которые раз в FLUSH_INTERVAL уходят в
+core.metrics как template_renders и template_us с меткой template=<имя>.
+"""
+import sys
+import threading
+import time
+from collections import Counter
+
+from django.template.base import Template
+
+from core import metrics
+
+FLUSH_INTERVAL = 10
+THUMBNAIL = '{% thumbnail %}'
+THUMBNAIL_MODULE = 'sorl.thumbnail.templatetags.thumbnail'
+
+_state = threading.local()
+_totals = Counter()
+_totals_lock = threading.Lock()
+_flushed_at = time.monotonic()
+_thumbnails_timed = False
+
+
+class RenderTimings:
+    """Замеры одного запроса: имя -> [рендеры, полное, собственное]."""
+
+    def __init__(self):
+        self.entries = {}
+        # собственное время открытых рендеров уменьшается на вложенные
+        self.children = []
+
+    def enter(self):
+        self.children.append(0.0)
+
+    def exit(self, name, elapsed):
+        nested = self.children.pop()
+        if self.children:
+            self.children[-1] += elapsed
+        entry = self.entries.setdefault(name, [0, 0.0, 0.0])
+        entry[0] += 1
+        entry[1] += elapsed
+        entry[2] += elapsed - nested
+
+    def rows(self):
+        """Строки (имя, рендеры, полное, собственное) по убыванию."""
+        return sorted(
+            ((name, *entry) for name, entry in self.entries.items()),
+            key=lambda row: row[3], reverse=True,
+        )
+
+
+def start():
+    _state.timings = RenderTimings()
+
+
+def stop():
+    timings = getattr(_state, 'timings', None)
+    _state.timings = None
+    if timings is not None:
+        collect(timings)
+    return timings
+
+
+def timed(name, render, *args):
+    timings = getattr(_state, 'timings', None)
+    if timings is None:
+        return render(*args)
+    if not _thumbnails_timed:
+        time_thumbnails()
+    timings.enter()
+    started = time.perf_counter()
+    try:
+        return render(*args)
+    finally:
+        timings.exit(name, time.perf_counter() - started)
+
+
+def collect(timings):
+    global _flushed_at
+    with _totals_lock:
+        for name, count, _, own in timings.rows():
+            _totals['template_renders', name] += count
+            _totals['template_us', name] += round(own * 1000000)
+        if time.monotonic() - _flushed_at < FLUSH_INTERVAL:
+            return
+        totals = dict(_totals)
+        _totals.clear()
+        _flushed_at = time.monotonic()
+    for (metric, name), value in totals.items():
+        metrics.incr(metric, value, template=name)
+
+
+def timed_method(cls, method, label):
+    """Оборачивает cls.method замером под именем label(self)."""
+    render = getattr(cls, method)
+    if getattr(render, 'timed', False):
+        return
+
+    def timed_render(self, context):
+        return timed(label(self), render, self, context)
+
+    timed_render.timed = True
+    setattr(cls, method, timed_render)
+
+
+def time_thumbnails():
+    """
+    {% thumbnail %} подменяется при первом рендере: библиотеку тегов sorl
+    к этому времени уже загрузил движок шаблонов, а при старте воркера
+    её импорт не нужен.
+    """
+    global _thumbnails_timed
+    module = sys.modules.get(THUMBNAIL_MODULE)
+    if module is not None:
+        timed_method(module.ThumbnailNode, 'render', lambda node: THUMBNAIL)
+        _thumbnails_timed = True
+
+
+def install():
+    """Подменяет рендер шаблонов; повторно не ставится."""
+    timed_method(
+        Template, '_render', lambda template: template.name or '<string>'
+    )
@@ -1,4 +1,29 @@
-from django.test import Client, TestCase
+import gzip
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import (Client, RequestFactory, SimpleTestCase, TestCase,
+                         override_settings)
+from django.urls import reverse
+
+from core import metrics, template_timing
+from core.cache import TieredCache
+from core.management.commands.profile_imports import parse_importtime
+from core.middleware.compression import CompressionMiddleware
+from core.middleware.profiler import HEADER, make_token, rotate
+from core.middleware.query_log import QueryLogMiddleware
+from core.static import IMMUTABLE_CACHE_CONTROL, StaticAssetsHandler
+from core.storage import CompressedManifestStaticFilesStorage
+from core.template_timing import RenderTimings
+from posts.models import Post
 
 
 class ViewTestClass(TestCase):
@@ -9,3 +34,395 @@ class ViewTestClass(TestCase):
         # Проверьте, что используется шаблон core/404.html
         self.assertEqual(response.status_code, 404)
         self.assertTemplateUsed(response, "core/404.html")
+
+
+class StaticAssetsTest(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.source = tempfile.mkdtemp()
+        cls.root = tempfile.mkdtemp()
+        os.makedirs(os.path.join(cls.source, 'css'))
+        with open(os.path.join(cls.source, 'css', 'site.css'), 'w') as css:
+            css.write('body { margin: 0; }\n' * 100)
+        with override_settings(
+            STATICFILES_DIRS=[cls.source],
+            STATIC_ROOT=cls.root,
+        ):
+            call_command('collectstatic', interactive=False, verbosity=0)
+        with open(os.path.join(cls.root, 'staticfiles.json')) as manifest:
+            cls.hashed = json.load(manifest)['paths']['css/site.css']
+        cls.handler = StaticAssetsHandler(
+            cls.fallback, root=cls.root, prefix='/static/'
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(cls.source, ignore_errors=True)
+        shutil.rmtree(cls.root, ignore_errors=True)
+
+    @staticmethod
+    def fallback(environ, start_response):
+        start_response('200 OK', [('Content-Type', 'text/plain')])
+        return [b'django']
+
+    def request(self, path, **headers):
+        environ = {'REQUEST_METHOD': 'GET', 'PATH_INFO': path, **headers}
+        result = {}
+
+        def start_response(status, response_headers):
+            result['status'] = status
+            result['headers'] = dict(response_headers)
+
+        body = b''.join(self.handler(environ, start_response))
+        return result['status'], result['headers'], body
+
+    def test_missing_manifest_entry(self):
+        storage = CompressedManifestStaticFilesStorage(location=self.root)
+        with override_settings(STATIC_MANIFEST_STRICT=True):
+            with self.assertRaises(ValueError):
+                storage.url('css/missing.css')
+        with override_settings(STATIC_MANIFEST_STRICT=False):
+            self.assertEqual(
+                storage.url('css/missing.css'), '/static/css/missing.css'
+            )
+        self.assertTrue(storage.url('css/site.css').endswith(self.hashed))
+
+    def test_collectstatic_builds_hashed_and_gzip_files(self):
+        """collectstatic кладёт файл с хешем и его .gz копию."""
+        self.assertNotEqual(self.hashed, 'css/site.css')
+        self.assertTrue(
+            os.path.isfile(os.path.join(self.root, self.hashed + '.gz'))
+        )
+
+    def test_hashed_file_is_immutable_and_gzipped(self):
+        """Хешированный файл отдаётся сжатым и с immutable кэшем."""
+        status, headers, body = self.request(
+            '/static/' + self.hashed, HTTP_ACCEPT_ENCODING='gzip, deflate'
+        )
+        self.assertEqual(status, '200 OK')
+        self.assertEqual(headers['Cache-Control'], IMMUTABLE_CACHE_CONTROL)
+        self.assertEqual(headers['Content-Encoding'], 'gzip')
+        self.assertEqual(headers['Vary'], 'Accept-Encoding')
+        self.assertIn(b'margin', gzip.decompress(body))
+
+    def test_identity_when_gzip_not_accepted(self):
+        """Без поддержки gzip клиент получает исходный файл."""
+        status, headers, body = self.request(
+            '/static/' + self.hashed, HTTP_ACCEPT_ENCODING='gzip;q=0'
+        )
+        self.assertNotIn('Content-Encoding', headers)
+        self.assertTrue(body.startswith(b'body'))
+
+    def test_not_modified(self):
+        """Совпавший ETag даёт 304 без тела."""
+        _, headers, _ = self.request('/static/' + self.hashed)
+        status, _, body = self.request(
+            '/static/' + self.hashed, HTTP_IF_NONE_MATCH=headers['ETag']
+        )
+        self.assertEqual(status, '304 Not Modified')
+        self.assertEqual(body, b'')
+
+    def test_unknown_path_goes_to_django(self):
+        """Всё, чего нет в статике, обрабатывает Django."""
+        _, _, body = self.request('/static/missing.css')
+        self.assertEqual(body, b'django')
+        _, _, body = self.request('/')
+        self.assertEqual(body, b'django')
+
+
+class CompressionMiddlewareTest(SimpleTestCase):
+    html = '<article><p>Тестовый пост</p></article>' * 100
+
+    def compress(self, response, accept_encoding='gzip'):
+        request = RequestFactory().get(
+            '/', HTTP_ACCEPT_ENCODING=accept_encoding
+        )
+        return CompressionMiddleware(lambda request: response)(request)
+
+    def test_html_is_gzipped(self):
+        """Большой HTML сжимается gzip, Vary выставлен."""
+        response = self.compress(HttpResponse(self.html))
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(gzip.decompress(response.content).decode(), self.html)
+
+    def test_streaming_response_is_gzipped(self):
+        """Потоковый ответ сжимается по кускам без Content-Length."""
+        chunks = [part.encode() for part in self.html.split('</article>')]
+        response = self.compress(StreamingHttpResponse(chunks))
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertFalse(response.has_header('Content-Length'))
+        body = gzip.decompress(b''.join(response.streaming_content))
+        self.assertEqual(body, b''.join(chunks))
+
+    def test_skipped_responses(self):
+        """Короткие, уже сжатые, частичные ответы и картинки не трогаем."""
+        compressed = HttpResponse(self.html)
+        compressed['Content-Encoding'] = 'br'
+        partial = HttpResponse(self.html, status=206)
+        ranged = HttpResponse(self.html, content_type='text/plain')
+        ranged['Content-Range'] = f'bytes 0-{len(self.html) - 1}/*'
+        responses = (
+            HttpResponse('<p>коротко</p>'),
+            compressed,
+            partial,
+            ranged,
+            HttpResponse(b'\x89PNG' * 500, content_type='image/png'),
+        )
+        for response in responses:
+            with self.subTest(response=response):
+                content = response.content
+                result = self.compress(response)
+                self.assertEqual(result.content, content)
+
+    def test_no_accept_encoding(self):
+        """Клиент без gzip получает исходный ответ."""
+        response = self.compress(HttpResponse(self.html), accept_encoding='')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(response.content.decode(), self.html)
+
+
+class TieredCacheTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.tiered = TieredCache(self.id(), {
+            'OPTIONS': {'SHARED_ALIAS': 'default', 'LOCAL_TIMEOUT': 60},
+        })
+
+    def test_second_read_served_locally(self):
+        """Повторное чтение берётся из LRU процесса, не из общего кэша."""
+        cache.set('key', 'shared')
+        self.assertEqual(self.tiered.get('key'), 'shared')
+        # другой процесс поменял значение — локальная копия ещё жива
+        cache.set('key', 'changed')
+        self.assertEqual(self.tiered.get('key'), 'shared')
+        self.assertEqual(
+            self.tiered.hit_rates(), {'shared_hit': 0.5, 'local_hit': 0.5}
+        )
+
+    def test_writes_go_to_shared_cache(self):
+        self.tiered.set('key', 1)
+        self.assertEqual(cache.get('key'), 1)
+        self.assertEqual(self.tiered.incr('key'), 2)
+        self.assertEqual(self.tiered.get('key'), 2)
+        self.tiered.delete('key')
+        self.assertIsNone(self.tiered.get('key'))
+
+    def test_local_copy_expires(self):
+        self.tiered.local.timeout = 0
+        cache.set('key', 'shared')
+        self.tiered.get('key')
+        cache.set('key', 'changed')
+        self.assertEqual(self.tiered.get('key'), 'changed')
+
+    def test_lru_is_bounded(self):
+        self.tiered.local.max_entries = 2
+        for key in ('a', 'b', 'c'):
+            self.tiered.set(key, key)
+        self.assertEqual(len(self.tiered.local.data), 2)
+        self.assertNotIn(('a', None), self.tiered.local.data)
+
+
+class MetricsTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_counters_created_concurrently_are_all_listed(self):
+        """Ряд, созданный другим воркером во время записи списка рядов,
+        не теряется."""
+        set_value = cache.set
+        interleaved = []
+
+        def set_during_other_worker(key, *args, **kwargs):
+            if not interleaved and key.startswith(metrics.KEY_PREFIX):
+                interleaved.append(key)
+                metrics.incr('other_worker')
+            return set_value(key, *args, **kwargs)
+
+        with mock.patch.object(cache, 'set', set_during_other_worker):
+            metrics.incr('this_worker')
+        self.assertTrue(interleaved)
+        self.assertEqual(
+            metrics.snapshot(), {'other_worker': 1, 'this_worker': 1}
+        )
+
+
+class ProfilerMiddlewareTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        settings = override_settings(PROFILER_ROOT=self.root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def profiles(self, templates=False):
+        return {
+            os.path.relpath(os.path.join(path, name), self.root)
+            for path, _, names in os.walk(self.root) for name in names
+            if templates or not name.endswith('.templates')
+        }
+
+    def test_unsigned_requests_are_not_profiled(self):
+        self.client.get('/')
+        self.client.get('/', **{HEADER: 'forged'})
+        self.assertEqual(self.profiles(), set())
+
+    def test_signed_header_writes_pstats_per_view(self):
+        self.client.get('/', **{HEADER: make_token('cprofile')})
+        (profile,) = self.profiles()
+        self.assertTrue(profile.startswith('posts.index' + os.sep))
+        self.assertTrue(profile.endswith('.prof'))
+
+    def test_template_breakdown_is_written_next_to_profile(self):
+        self.client.get('/', **{HEADER: make_token('cprofile')})
+        (profile,) = self.profiles()
+        templates = profile.replace('.prof', '.templates')
+        self.assertIn(templates, self.profiles(templates=True))
+        with open(os.path.join(self.root, templates)) as table:
+            names = [line.split()[0] for line in table][1:]
+        self.assertIn('posts/index.html', names)
+        self.assertIn('includes/header.html', names)
+
+    def test_sampling_writes_folded_stacks(self):
+        with override_settings(PROFILER_SAMPLE_RATE=1):
+            self.client.get('/')
+        (profile,) = self.profiles()
+        self.assertTrue(profile.endswith('.folded'))
+        with open(os.path.join(self.root, profile)) as folded:
+            for line in folded:
+                stack, count = line.rsplit(' ', 1)
+                self.assertTrue(int(count) > 0)
+
+    def test_rotation_keeps_newest_files(self):
+        for index in range(5):
+            path = os.path.join(self.root, f'{index}.prof')
+            open(path, 'w').close()
+            os.utime(path, (index, index))
+        for index in (0, 4):
+            path = os.path.join(self.root, f'{index}.templates')
+            open(path, 'w').close()
+            os.utime(path, (index, index))
+        rotate(self.root, 2)
+        self.assertEqual(
+            self.profiles(templates=True),
+            {'3.prof', '4.prof', '4.templates'},
+        )
+
+    def test_profile_token_command(self):
+        out = StringIO()
+        call_command('profile_token', mode='sampling', stdout=out,
+                     stderr=StringIO())
+        self.client.get('/', **{HEADER: out.getvalue().strip()})
+        (profile,) = self.profiles()
+        self.assertTrue(profile.endswith('.folded'))
+
+
+class TemplateTimingTest(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_includes_are_timed_separately(self):
+        response = self.client.get('/')
+        rows = {
+            name: (count, total, own)
+            for name, count, total, own in response.wsgi_request
+            .template_timings.rows()
+        }
+        self.assertIn('includes/header.html', rows)
+        self.assertIn('includes/footer.html', rows)
+        page_count, page_total, page_own = rows['posts/index.html']
+        self.assertEqual(page_count, 1)
+        # время include входит в полное время страницы, но не в собственное
+        self.assertGreater(page_total, page_own)
+
+    def test_nested_time_is_excluded_from_own_time(self):
+        timings = RenderTimings()
+        timings.enter()
+        timings.enter()
+        timings.exit('include.html', 2.0)
+        timings.exit('page.html', 5.0)
+        self.assertEqual(timings.rows(), [
+            ('page.html', 1, 5.0, 3.0),
+            ('include.html', 1, 2.0, 2.0),
+        ])
+
+    def test_totals_are_flushed_to_metrics(self):
+        timings = RenderTimings()
+        timings.enter()
+        timings.exit('page.html', 0.25)
+        with mock.patch.object(template_timing, '_flushed_at', 0):
+            template_timing.collect(timings)
+        snapshot = metrics.labelled_snapshot()
+        labels = (('template', 'page.html'),)
+        self.assertEqual(snapshot['template_renders', labels], 1)
+        self.assertEqual(snapshot['template_us', labels], 250000)
+
+    def test_template_label_is_escaped(self):
+        """Имя шаблона уходит в /metrics/ меткой, экранированной для
+        Prometheus."""
+        metrics.incr('template_renders', template='a\\b"c"\nd.html')
+        self.client.force_login(get_user_model().objects.create(
+            username='admin', is_staff=True
+        ))
+        response = self.client.get(reverse('metrics'))
+        self.assertContains(
+            response,
+            'yatube_template_renders{template="a\\\\b\\"c\\"\\nd.html"} 1',
+        )
+
+
+class QueryLogMiddlewareTest(TestCase):
+    def test_slow_query_names_template_line(self):
+        user = get_user_model().objects.create(username='author')
+        post = Post.objects.create(author=user, text='Текст')
+        with override_settings(SLOW_QUERY_THRESHOLD=0), \
+                self.assertLogs('core.sql') as logs:
+            self.client.get(f'/posts/{post.pk}/')
+        (count_query,) = [
+            line for line in logs.output if 'COUNT(*)' in line
+        ]
+        self.assertIn('posts:post_detail', count_query)
+        self.assertIn(
+            'posts/post_detail.html:28 {{ post.author.posts.count }}',
+            count_query,
+        )
+        self.assertIn('posts/views.py', count_query)
+
+    def test_repeated_query_is_reported_once(self):
+        def view(request):
+            for _ in range(5):
+                list(get_user_model().objects.filter(pk=1))
+            return HttpResponse()
+
+        request = RequestFactory().get('/')
+        request.resolver_match = None
+        with override_settings(N_PLUS_ONE_THRESHOLD=3), \
+                self.assertLogs('core.sql') as logs:
+            QueryLogMiddleware(view)(request)
+        (warning,) = logs.output
+        self.assertIn('повторяется 3 раз во вьюхе unresolved', warning)
+        self.assertIn('core/tests.py', warning)
+
+
+class ProfileImportsTest(SimpleTestCase):
+    def test_parse_importtime(self):
+        output = (
+            'import time: self [us] | cumulative | imported package\n'
+            'import time:       120 |        120 |   django.conf\n'
+            'import time:       300 |        420 | django\n'
+        )
+        self.assertEqual(list(parse_importtime(output)), [
+            ('django.conf', 120, 120), ('django', 300, 420),
+        ])
+
+    def test_worker_boot_skips_deferred_modules(self):
+        # --check падает, если при старте загрузилась админка, Pillow,
+        # теги sorl или django.test; бюджет времени тут не проверяем
+        out = StringIO()
+        call_command('profile_imports', top=3, repeat=1, budget=60000,
+                     check=True, stdout=out, stderr=StringIO())
+        self.assertIn('Старт (wsgi)', out.getvalue())
+        self.assertIn('yatube.wsgi', out.getvalue())
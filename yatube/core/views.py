@@ -1,5 +1,9 @@
+from django.core.exceptions import PermissionDenied
+from django.http import HttpResponse
 from django.shortcuts import render
 
+from . import metrics as counters
+
 
 def page_not_found(request, exception):
     # Переменная exception содержит отладочную информацию,
@@ -17,3 +21,29 @@ def permission_denied(request, exception):
 
 def csrf_failure(request, reason=''):
     return render(request, 'core/403csrf.html')
+
+
+def label_value(value):
+    """Значение метки Prometheus: экранируются \\, " и перевод строки."""
+    return (
+        value.replace('\\', '\\\\').replace('"', '\\"')
+        .replace('\n', '\\n')
+    )
+
+
+def metrics(request):
+    """Счётчики кэшей в текстовом формате Prometheus, только для staff."""
+    if not request.user.is_staff:
+        raise PermissionDenied
+    lines = [
+        f'yatube_{name} {value}'
+        for name, value in counters.snapshot().items()
+    ]
+    for (name, labels), value in counters.labelled_snapshot().items():
+        pairs = ','.join(
+            f'{label}="{label_value(text)}"' for label, text in labels
+        )
+        lines.append(f'yatube_{name}{{{pairs}}} {value}')
+    return HttpResponse(
+        '\n'.join(lines) + '\n', content_type='text/plain; version=0.0.4'
+    )
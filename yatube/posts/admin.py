@@ -1,28 +1,304 @@
-from django.contrib import admin
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin import helpers
+from django.contrib.admin.views.main import ORDER_VAR, PAGE_VAR, ChangeList
+from django.template.response import TemplateResponse
 
+from .bulk import (soft_delete_comments, soft_delete_posts, update_comments,
+                   update_posts)
+from .forms import CatalogueChoiceIterator
+from .models import DELETED, LIVE, Comment, Follow, Group, GroupFollow, Post
+from .utils import CachedCountPaginator
 
-from .models import Comment, Follow, Group, Post
+CURSOR_VAR = 'before'
+# курсор по pk возможен только при сортировке по pk
+CURSOR_LOOKUPS = {('-pk',): 'pk__lt', ('pk',): 'pk__gt'}
 
 
-class PostAdmin(admin.ModelAdmin):
-    list_display = ('pk', 'text', 'pub_date', 'author', 'group',)
+class CursorChangeList(ChangeList):
+    """
+    Список с переходом «следующие» по ?before=<pk>: WHERE pk < before
+    вместо OFFSET, который на дальних страницах перебирает всю таблицу.
+    Курсор работает при сортировке админки по pk и без сортировки
+    по колонкам.
+    """
+
+    def __init__(self, request, *args, **kwargs):
+        cursor = request.GET.get(CURSOR_VAR, '')
+        self.cursor = int(cursor) if cursor.isdigit() else None
+        self.next_cursor_query = None
+        super().__init__(request, *args, **kwargs)
+
+    def get_filters_params(self, params=None):
+        lookup_params = super().get_filters_params(params)
+        lookup_params.pop(CURSOR_VAR, None)
+        return lookup_params
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        self.cursor_lookup = None
+        if ORDER_VAR not in self.params:
+            self.cursor_lookup = CURSOR_LOOKUPS.get(
+                tuple(self.model_admin.get_ordering(request))
+            )
+        if self.cursor_lookup and self.cursor is not None:
+            queryset = queryset.filter(**{self.cursor_lookup: self.cursor})
+        return queryset
+
+    def get_results(self, request):
+        super().get_results(request)
+        if not self.cursor_lookup or not self.multi_page:
+            return
+        # result_list кэширует строки, шаблон второй раз их не выбирает
+        results = list(self.result_list)
+        if len(results) == self.list_per_page:
+            self.next_cursor_query = self.get_query_string(
+                {CURSOR_VAR: results[-1].pk}, [PAGE_VAR]
+            )
+
+
+class PerformanceAdminMixin:
+    """
+    Быстрые списки объектов для больших таблиц: оценка числа строк
+    вместо COUNT(*) по всей таблице, без второго подсчёта «всего»,
+    и курсорная навигация. Связанные объекты из list_display
+    подгружаются через list_select_related.
+    """
+    ordering = ('-pk',)
+    show_full_result_count = False
+    change_list_template = 'admin/cursor_change_list.html'
+
+    def get_changelist(self, request, **kwargs):
+        return CursorChangeList
+
+    def get_paginator(self, request, queryset, per_page, orphans=0,
+                      allow_empty_first_page=True):
+        return CachedCountPaginator(
+            queryset, per_page, orphans=orphans,
+            allow_empty_first_page=allow_empty_first_page,
+        )
+
+
+class MoveToGroupForm(forms.Form):
+    group = forms.ModelChoiceField(Group.objects.all(), label='Группа')
+
+
+class BatchProgress:
+    """Счётчик пачек для сообщения модератору."""
+
+    def __init__(self):
+        self.batches = 0
+
+    def __call__(self, rows):
+        self.batches += 1
+
+
+def author_ids(queryset):
+    # список, а не подзапрос: выбранные строки удаляются по ходу дела
+    return list(
+        queryset.order_by().values_list('author_id', flat=True).distinct()
+    )
+
+
+class BulkActionsMixin:
+    """
+    Действия модерации пачками (posts.bulk) со страницей подтверждения.
+    Заменяют delete_selected, который грузит каждый объект.
+    """
+
+    def get_actions(self, request):
+        actions = super().get_actions(request)
+        actions.pop('delete_selected', None)
+        return actions
+
+    def run_bulk(self, request, queryset, title, operation, form=None):
+        confirmed = 'apply' in request.POST
+        if not confirmed or (form is not None and not form.is_valid()):
+            return self.confirm_bulk(request, queryset, title, form)
+        progress = BatchProgress()
+        fields = form.cleaned_data if form is not None else {}
+        rows = operation(queryset, progress=progress, **fields)
+        self.message_user(
+            request,
+            f'{title}: строк {rows}, пачек {progress.batches}',
+            messages.SUCCESS,
+        )
+        return None
+
+    def confirm_bulk(self, request, queryset, title, form):
+        context = {
+            **self.admin_site.each_context(request),
+            'title': title,
+            'opts': self.model._meta,
+            'form': form,
+            'count': queryset.count(),
+            'action': request.POST['action'],
+            'select_across': request.POST.get('select_across', '0'),
+            'selected': request.POST.getlist(helpers.ACTION_CHECKBOX_NAME),
+            'action_checkbox_name': helpers.ACTION_CHECKBOX_NAME,
+        }
+        return TemplateResponse(
+            request, 'admin/posts/bulk_confirmation.html', context
+        )
+
+
+class DeletedListFilter(admin.SimpleListFilter):
+    title = 'удалено'
+    parameter_name = 'deleted'
+
+    def lookups(self, request, model_admin):
+        return (('yes', 'Да'), ('no', 'Нет'))
+
+    def queryset(self, request, queryset):
+        if self.value() == 'yes':
+            return queryset.filter(DELETED)
+        if self.value() == 'no':
+            return queryset.filter(LIVE)
+        return queryset
+
+
+class SoftDeleteAdminMixin:
+    """
+    Мягко удалённые строки видны в админке (all_objects, фильтр
+    «удалено») и восстанавливаются действием, пока их не удалила
+    purge_deleted. Удаление со страницы объекта тоже мягкое.
+    """
+
+    def get_queryset(self, request):
+        queryset = self.model.all_objects.get_queryset()
+        ordering = self.get_ordering(request)
+        if ordering:
+            queryset = queryset.order_by(*ordering)
+        return queryset
+
+    def get_list_filter(self, request):
+        return (DeletedListFilter, *super().get_list_filter(request))
+
+    def get_deleted_objects(self, objs, request):
+        # строки остаются в базе: каскада, который стоило бы показать, нет
+        return [str(obj) for obj in objs], {}, set(), []
+
+    def delete_model(self, request, obj):
+        obj.soft_delete()
+
+
+class PostAdmin(SoftDeleteAdminMixin, BulkActionsMixin, PerformanceAdminMixin,
+                admin.ModelAdmin):
+    list_display = ('pk', 'text', 'pub_date', 'author', 'group', 'deleted_at')
+    list_select_related = ('author', 'group')
     list_editable = ('group',)
     search_fields = ('text',)
     list_filter = ('pub_date',)
     empty_value_display = '-пусто-'
+    actions = (
+        'move_to_group', 'clear_group', 'delete_selected_posts',
+        'delete_author_posts', 'restore_posts',
+    )
 
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        field = super().formfield_for_foreignkey(db_field, request, **kwargs)
+        if db_field.name == 'group':
+            # list_editable рисует <select> групп в каждой строке:
+            # варианты берём из каталога, а не запросом на строку
+            field.iterator = CatalogueChoiceIterator
+            field.widget.choices = field.choices
+        return field
 
-class GroupAdmin(admin.ModelAdmin):
+    def move_to_group(self, request, queryset):
+        form = MoveToGroupForm(request.POST if 'apply' in request.POST
+                               else None)
+        return self.run_bulk(
+            request, queryset, 'Перенос в группу', update_posts, form
+        )
+    move_to_group.short_description = 'Перенести в группу'
+
+    def clear_group(self, request, queryset):
+        return self.run_bulk(
+            request, queryset, 'Удаление из группы',
+            lambda rows, progress: update_posts(rows, progress, group=None),
+        )
+    clear_group.short_description = 'Убрать из группы'
+
+    def delete_selected_posts(self, request, queryset):
+        return self.run_bulk(
+            request, queryset, 'Удаление постов', soft_delete_posts
+        )
+    delete_selected_posts.short_description = 'Удалить выбранные посты'
+
+    def delete_author_posts(self, request, queryset):
+        return self.run_bulk(
+            request, queryset, 'Удаление всех постов авторов',
+            lambda rows, progress: soft_delete_posts(
+                Post.objects.filter(author_id__in=author_ids(rows)), progress,
+            ),
+        )
+    delete_author_posts.short_description = (
+        'Удалить все посты авторов выбранных постов'
+    )
+
+    def restore_posts(self, request, queryset):
+        return self.run_bulk(
+            request, queryset, 'Восстановление постов',
+            lambda rows, progress: update_posts(
+                rows, progress, deleted_at=None
+            ),
+        )
+    restore_posts.short_description = 'Восстановить удалённые посты'
+
+
+class GroupAdmin(PerformanceAdminMixin, admin.ModelAdmin):
     list_display = ('pk', 'title', 'slug', 'description')
     ordering = ('pk',)
 
 
-class CommentAdmin(admin.ModelAdmin):
-    list_display = ('post', 'author', 'text')
+class CommentAdmin(SoftDeleteAdminMixin, BulkActionsMixin,
+                   PerformanceAdminMixin, admin.ModelAdmin):
+    list_display = ('post', 'author', 'text', 'deleted_at')
+    list_select_related = ('post', 'author')
+    actions = (
+        'delete_selected_comments', 'delete_author_comments',
+        'restore_comments',
+    )
 
+    def delete_selected_comments(self, request, queryset):
+        return self.run_bulk(
+            request, queryset, 'Удаление комментариев',
+            soft_delete_comments,
+        )
+    delete_selected_comments.short_description = (
+        'Удалить выбранные комментарии'
+    )
 
-class FollowAdmin(admin.ModelAdmin):
+    def delete_author_comments(self, request, queryset):
+        return self.run_bulk(
+            request, queryset, 'Удаление всех комментариев авторов',
+            lambda rows, progress: soft_delete_comments(
+                Comment.objects.filter(author_id__in=author_ids(rows)),
+                progress,
+            ),
+        )
+    delete_author_comments.short_description = (
+        'Удалить все комментарии авторов выбранных комментариев'
+    )
+
+    def restore_comments(self, request, queryset):
+        return self.run_bulk(
+            request, queryset, 'Восстановление комментариев',
+            lambda rows, progress: update_comments(
+                rows, progress, deleted_at=None
+            ),
+        )
+    restore_comments.short_description = 'Восстановить удалённые комментарии'
+
+
+class FollowAdmin(PerformanceAdminMixin, admin.ModelAdmin):
     list_display = ('user', 'author')
+    list_select_related = ('user', 'author')
+
+
+class GroupFollowAdmin(PerformanceAdminMixin, admin.ModelAdmin):
+    list_display = ('user', 'group')
+    list_select_related = ('user', 'group')
 
 
 # При регистрации модели Post источником конфигурации для неё назначаем
@@ -31,3 +307,4 @@ admin.site.register(Post, PostAdmin)
 admin.site.register(Group, GroupAdmin)
 admin.site.register(Comment, CommentAdmin)
 admin.site.register(Follow, FollowAdmin)
+admin.site.register(GroupFollow, GroupFollowAdmin)
@@ -0,0 +1,161 @@
+"""
+Массовые изменения постов и комментариев для модерации.
+
+Строки меняются пачками по BATCH_SIZE одним UPDATE/DELETE на пачку,
+без загрузки объектов и без сигналов на каждую строку. Поэтому версии
+кэша (posts.cache), которые обычно увеличивают сигналы, здесь
+увеличиваются по пачке целиком.
+
+Модерация удаляет мягко (deleted_at), насовсем строки удаляет
+purge_deleted, когда истечёт срок хранения.
+"""
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+from sorl.thumbnail import delete as delete_image
+
+from .cache import bump_version
+from .models import Comment, Post
+from .prerender import prerender_posts_change
+from .sitemaps import chunk_scope
+
+BATCH_SIZE = 1000
+
+
+def iter_batches(queryset, batch_size=BATCH_SIZE):
+    """pk строк queryset пачками, по возрастанию pk."""
+    last = 0
+    while True:
+        pks = list(
+            queryset.filter(pk__gt=last).order_by('pk')
+            .values_list('pk', flat=True)[:batch_size]
+        )
+        if not pks:
+            return
+        yield pks
+        last = pks[-1]
+
+
+def post_batch_scopes(rows):
+    """Версии, которые меняет пачка строк (pk, author_id, group_id)."""
+    scopes = {'index'}
+    for pk, author_id, group_id in rows:
+        scopes.add(f'author:{author_id}')
+        scopes.add(f'post:{pk}')
+        scopes.add(chunk_scope('posts', pk))
+        if group_id is not None:
+            scopes.add(f'group:{group_id}')
+    return scopes
+
+
+def prerender_batch(rows, group_ids=()):
+    """Перерисовать после коммита пачки страницы её авторов и групп."""
+    author_ids = {row[1] for row in rows}
+    prerender_posts_change(
+        author_ids, {*(row[2] for row in rows), *group_ids}
+    )
+
+
+def delete_rows(queryset):
+    # QuerySet.delete() выбирает строки ради сигналов и каскада,
+    # каскад здесь уже сделан явно, а версии сбрасываются по пачке
+    return queryset._raw_delete(queryset.db)
+
+
+def update_posts(queryset, progress=None, batch_size=BATCH_SIZE, **fields):
+    """UPDATE постов пачками; возвращает число изменённых строк."""
+    updated = 0
+    for pks in iter_batches(queryset, batch_size):
+        batch = Post.all_objects.filter(pk__in=pks)
+        rows = list(batch.values_list('pk', 'author_id', 'group_id'))
+        scopes = post_batch_scopes(rows)
+        group_ids = set()
+        if fields.get('group') is not None:
+            group_ids.add(fields['group'].pk)
+            scopes.add(f'group:{fields["group"].pk}')
+        with transaction.atomic():
+            updated += batch.update(**fields)
+            prerender_batch(rows, group_ids)
+        bump_version(*scopes)
+        if progress is not None:
+            progress(updated)
+    return updated
+
+
+def delete_posts(queryset, progress=None, batch_size=BATCH_SIZE):
+    """Удаляет посты с их комментариями и картинками пачками."""
+    deleted = 0
+    for pks in iter_batches(queryset, batch_size):
+        batch = Post.all_objects.filter(pk__in=pks)
+        rows = list(
+            batch.values_list('pk', 'author_id', 'group_id', 'image')
+        )
+        with transaction.atomic():
+            delete_rows(Comment.all_objects.filter(post_id__in=pks))
+            deleted += delete_rows(batch)
+            prerender_batch(rows)
+        bump_version(*post_batch_scopes(row[:3] for row in rows))
+        for *_, image in rows:
+            if image:
+                delete_image(image)
+        if progress is not None:
+            progress(deleted)
+    return deleted
+
+
+def update_comments(queryset, progress=None, batch_size=BATCH_SIZE,
+                    **fields):
+    """UPDATE комментариев пачками; возвращает число изменённых строк."""
+    updated = 0
+    for pks in iter_batches(queryset, batch_size):
+        batch = Comment.all_objects.filter(pk__in=pks)
+        post_ids = set(batch.values_list('post_id', flat=True))
+        with transaction.atomic():
+            updated += batch.update(**fields)
+        bump_version(*(f'post:{pk}' for pk in post_ids))
+        if progress is not None:
+            progress(updated)
+    return updated
+
+
+def soft_delete_posts(queryset, progress=None, batch_size=BATCH_SIZE):
+    return update_posts(
+        queryset, progress, batch_size, deleted_at=timezone.now()
+    )
+
+
+def soft_delete_comments(queryset, progress=None, batch_size=BATCH_SIZE):
+    return update_comments(
+        queryset, progress, batch_size, deleted_at=timezone.now()
+    )
+
+
+def delete_comments(queryset, progress=None, batch_size=BATCH_SIZE):
+    """Удаляет комментарии пачками."""
+    deleted = 0
+    for pks in iter_batches(queryset, batch_size):
+        batch = Comment.all_objects.filter(pk__in=pks)
+        post_ids = set(batch.values_list('post_id', flat=True))
+        with transaction.atomic():
+            deleted += delete_rows(batch)
+        bump_version(*(f'post:{pk}' for pk in post_ids))
+        if progress is not None:
+            progress(deleted)
+    return deleted
+
+
+def purge_deleted(retention_days, progress=None, batch_size=BATCH_SIZE):
+    """
+    Удаляет насовсем строки, удалённые мягко раньше, чем retention_days
+    дней назад. Возвращает число удалённых постов и комментариев.
+    """
+    cutoff = timezone.now() - timedelta(days=retention_days)
+    comments = delete_comments(
+        Comment.all_objects.filter(deleted_at__lt=cutoff),
+        progress, batch_size,
+    )
+    posts = delete_posts(
+        Post.all_objects.filter(deleted_at__lt=cutoff), progress, batch_size
+    )
+    return posts, comments
@@ -0,0 +1,42 @@
+import time
+
+from django.core.cache import caches
+
+# версии читаются на каждом показе ленты — держим их в LRU процесса
+cache = caches['tiered']
+
+
+def version_key(scope: str) -> str:
+    return f'posts:version:{scope}'
+
+
+def initial_version() -> int:
+    # версия после вытеснения из кэша не должна повторить старую,
+    # иначе снова станут видны ключи, посчитанные до изменений
+    return int(time.time() * 1000)
+
+
+def get_version(scope: str) -> int:
+    """
+    Версия набора постов: 'index', 'author:<id>', 'group:<id>'.
+    Ключи кэша, в которые входит версия, устаревают при её увеличении.
+    """
+    key = version_key(scope)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, initial_version(), None)
+        version = cache.get(key, initial_version())
+    return version
+
+
+def bump_version(*scopes: str) -> None:
+    for scope in scopes:
+        try:
+            cache.incr(version_key(scope))
+        except ValueError:
+            cache.set(version_key(scope), initial_version(), None)
+
+
+def versions(*scopes: str) -> str:
+    """Общая версия нескольких наборов — для ключа {% cache %}."""
+    return '.'.join(str(get_version(scope)) for scope in scopes)
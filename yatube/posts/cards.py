@@ -0,0 +1,137 @@
+"""
+Карточки постов для лент: только колонки, которые показывает шаблон.
+
+Вместо экземпляров Post с полным набором полей, FieldFile картинки и
+связанными объектами лента получает компактные PostCard со __slots__.
+Группа карточки берётся из каталога групп, автор — из JOIN по username.
+Текст обрезается ещё в SQL до EXCERPT_LENGTH символов: длинный пост не
+раздувает ни выборку, ни страницу, целиком его показывает post_detail.
+"""
+from django.db.models.functions import Length, Substr
+from django.db.models.query import BaseIterable, ValuesListIterable
+
+from .cache import cache, get_version
+from .catalogue import get_group
+from .models import Post, User
+
+EXCERPT_LENGTH = 500
+AUTHOR_CACHE_TIMEOUT = 60 * 60
+CARD_FIELDS = (
+    'id', 'excerpt', 'text_length', 'pub_date', 'image', 'group_id',
+    'author_id', 'author__username',
+)
+
+
+class AuthorRef:
+    """Автор карточки: равен пользователю с тем же pk."""
+    __slots__ = ('id', 'username')
+
+    def __init__(self, id, username):
+        self.id = id
+        self.username = username
+
+    @property
+    def pk(self):
+        return self.id
+
+    def __eq__(self, other):
+        if isinstance(other, (User, AuthorRef)):
+            return self.pk == other.pk
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self.pk)
+
+    def __str__(self):
+        return self.username
+
+
+def get_author(username):
+    """
+    Активный автор по username или None; кэш сбрасывает версия 'users'.
+    Отсутствие автора тоже кэшируется: ленты и страницы удалённых
+    запрашивают годами.
+    """
+    key = f'posts:author:{username}:{get_version("users")}'
+    author = cache.get(key)
+    if author is None:
+        row = User.objects.filter(
+            username=username, is_active=True
+        ).values_list('id', 'username').first()
+        author = AuthorRef(*row) if row else False
+        cache.set(key, author, AUTHOR_CACHE_TIMEOUT)
+    return author or None
+
+
+class PostCard:
+    """
+    Пост в ленте: равен Post с тем же pk. text — начало поста,
+    is_truncated — есть ли продолжение на странице поста.
+    """
+    __slots__ = (
+        'id', 'text', 'is_truncated', 'pub_date', 'image', 'group_id',
+        'author',
+    )
+
+    def __init__(self, id, text, is_truncated, pub_date, image, group_id,
+                 author):
+        self.id = id
+        self.text = text
+        self.is_truncated = is_truncated
+        self.pub_date = pub_date
+        # имя файла: sorl-thumbnail принимает его так же, как FieldFile
+        self.image = image
+        self.group_id = group_id
+        self.author = author
+
+    @property
+    def pk(self):
+        return self.id
+
+    @property
+    def group(self):
+        return get_group(self.group_id)
+
+    def __eq__(self, other):
+        if isinstance(other, (Post, PostCard)):
+            return self.pk == other.pk
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self.pk)
+
+    def __str__(self):
+        return self.text[:15]
+
+
+class PostCardIterable(BaseIterable):
+    """Строки values_list(*CARD_FIELDS), собранные в PostCard."""
+
+    def __iter__(self):
+        rows = ValuesListIterable(
+            self.queryset, self.chunked_fetch, self.chunk_size
+        )
+        authors = {}
+        for (pk, excerpt, text_length, pub_date, image, group_id,
+             author_id, username) in rows:
+            # один AuthorRef на автора в пределах страницы
+            author = authors.get(author_id)
+            if author is None:
+                author = authors[author_id] = AuthorRef(author_id, username)
+            yield PostCard(
+                pk, excerpt, text_length > EXCERPT_LENGTH, pub_date, image,
+                group_id, author,
+            )
+
+
+def post_cards(queryset):
+    """
+    Та же выборка постов, но карточками. Результат остаётся QuerySet,
+    так что пагинатор по-прежнему режет его и считает через COUNT.
+    """
+    cards = queryset.annotate(
+        excerpt=Substr('text', 1, EXCERPT_LENGTH),
+        text_length=Length('text'),
+    ).values_list(*CARD_FIELDS)
+    cards._iterable_class = PostCardIterable
+    return cards
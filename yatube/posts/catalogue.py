@@ -0,0 +1,82 @@
+"""
+Каталог групп, общий для процесса.
+
+Групп мало, а читают их на каждой странице: в выборе группы PostForm,
+при поиске группы по slug и в ссылках на группу в карточках постов.
+Каталог лежит в кэше 'tiered' под ключом с версией 'groups', которую
+posts.signals увеличивает при любом изменении группы.
+"""
+from django.http import Http404
+
+from .cache import cache, get_version
+from .models import Group
+
+CATALOGUE_TIMEOUT = 60 * 60
+
+
+class GroupRef:
+    """Лёгкая замена Group для чтения: равна группе с тем же pk."""
+    __slots__ = ('id', 'slug', 'title', 'description')
+
+    def __init__(self, id, slug, title, description):
+        self.id = id
+        self.slug = slug
+        self.title = title
+        self.description = description
+
+    @property
+    def pk(self):
+        return self.id
+
+    def __eq__(self, other):
+        if isinstance(other, (Group, GroupRef)):
+            return self.pk == other.pk
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self.pk)
+
+    def __str__(self):
+        return self.title
+
+
+class GroupCatalogue:
+    """Группы в порядке Group.Meta.ordering и индексы по id и slug."""
+
+    def __init__(self, groups):
+        self.groups = tuple(groups)
+        self.by_id = {group.id: group for group in self.groups}
+        self.by_slug = {group.slug: group for group in self.groups}
+
+    def __iter__(self):
+        return iter(self.groups)
+
+    def __len__(self):
+        return len(self.groups)
+
+
+def group_catalogue() -> GroupCatalogue:
+    key = f'posts:groups:{get_version("groups")}'
+    catalogue = cache.get(key)
+    if catalogue is None:
+        catalogue = GroupCatalogue(
+            GroupRef(*row) for row in Group.objects.values_list(
+                'id', 'slug', 'title', 'description'
+            )
+        )
+        cache.set(key, catalogue, CATALOGUE_TIMEOUT)
+    return catalogue
+
+
+def get_group(group_id):
+    """Группа по id из каталога, None — для поста без группы."""
+    if group_id is None:
+        return None
+    return group_catalogue().by_id.get(group_id)
+
+
+def get_group_or_404(slug):
+    group = group_catalogue().by_slug.get(slug)
+    if group is None:
+        raise Http404
+    return group
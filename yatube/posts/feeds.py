@@ -0,0 +1,146 @@
+"""
+RSS и Atom для общей ленты, групп и авторов.
+
+Читалки опрашивают ленты часто, а меняются они редко. Готовый XML лежит
+в кэше под ключом с версиями наборов постов (posts.cache), из них же
+собирается ETag. Повтор с If-None-Match получает 304 без запросов к
+базе: версии, группа и автор читаются из кэша. Last-Modified не отдаётся:
+дата новейшего поста не меняется при правке и удалении, и по
+If-Modified-Since читалка не увидела бы этих изменений.
+"""
+import hashlib
+
+from django.contrib.syndication.views import Feed
+from django.http import Http404, HttpResponse
+from django.urls import reverse
+from django.utils.cache import get_conditional_response
+from django.utils.feedgenerator import Atom1Feed
+from django.utils.text import Truncator
+
+from .cache import cache, versions
+from .cards import get_author, post_cards
+from .catalogue import get_group_or_404
+from .models import Post
+
+FEED_ITEMS = 20
+FEED_CACHE_TIMEOUT = 60 * 60
+TITLE_LENGTH = 50
+
+
+def get_author_or_404(username):
+    author = get_author(username)
+    if author is None:
+        raise Http404
+    return author
+
+
+class CachedPostsFeed(Feed):
+    """Лента постов с кэшем XML и ответами 304 по ETag."""
+    description = 'Новые записи Yatube'
+
+    def scopes(self, obj):
+        return ('index',)
+
+    def __call__(self, request, *args, **kwargs):
+        obj = self.get_object(request, *args, **kwargs)
+        key = 'posts:feed_xml:{}:{}:{}'.format(
+            type(self).__name__, request.path, versions(*self.scopes(obj))
+        )
+        entry = cache.get(key)
+        if entry is None:
+            response = super().__call__(request, *args, **kwargs)
+            entry = (response['Content-Type'], response.content)
+            cache.set(key, entry, FEED_CACHE_TIMEOUT)
+        content_type, content = entry
+        etag = '"{}"'.format(hashlib.md5(key.encode()).hexdigest())
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = HttpResponse(content, content_type=content_type)
+        response['ETag'] = etag
+        return response
+
+    def posts(self, obj):
+        return Post.objects.filter(author__is_active=True)
+
+    def items(self, obj):
+        return post_cards(self.posts(obj))[:FEED_ITEMS]
+
+    def item_title(self, item):
+        return Truncator(item.text).chars(TITLE_LENGTH)
+
+    def item_description(self, item):
+        return item.text
+
+    def item_link(self, item):
+        return reverse('posts:post_detail', kwargs={'post_id': item.pk})
+
+    def item_pubdate(self, item):
+        return item.pub_date
+
+    def item_author_name(self, item):
+        return item.author.username
+
+
+class LatestPostsFeed(CachedPostsFeed):
+    title = 'Yatube: последние записи'
+
+    def link(self):
+        return reverse('posts:index')
+
+
+class GroupPostsFeed(CachedPostsFeed):
+
+    def get_object(self, request, slug):
+        return get_group_or_404(slug)
+
+    def scopes(self, group):
+        return (f'group:{group.id}', 'groups')
+
+    def posts(self, group):
+        return super().posts(group).filter(group_id=group.id)
+
+    def title(self, group):
+        return f'Yatube: {group.title}'
+
+    def description(self, group):
+        return group.description
+
+    def link(self, group):
+        return reverse('posts:group_list', kwargs={'slug': group.slug})
+
+
+class AuthorPostsFeed(CachedPostsFeed):
+
+    def get_object(self, request, username):
+        return get_author_or_404(username)
+
+    def scopes(self, author):
+        return (f'author:{author.id}',)
+
+    def posts(self, author):
+        return super().posts(author).filter(author_id=author.id)
+
+    def title(self, author):
+        return f'Yatube: записи {author.username}'
+
+    def link(self, author):
+        return reverse(
+            'posts:profile', kwargs={'username': author.username}
+        )
+
+
+class LatestPostsAtomFeed(LatestPostsFeed):
+    feed_type = Atom1Feed
+    subtitle = LatestPostsFeed.description
+
+
+class GroupPostsAtomFeed(GroupPostsFeed):
+    feed_type = Atom1Feed
+
+    def subtitle(self, group):
+        return group.description
+
+
+class AuthorPostsAtomFeed(AuthorPostsFeed):
+    feed_type = Atom1Feed
+    subtitle = CachedPostsFeed.description
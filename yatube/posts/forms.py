@@ -1,8 +1,26 @@
 from django.forms import ModelForm
+from django.forms.models import ModelChoiceIterator
 
+from .catalogue import group_catalogue
 from .models import Comment, Post
 
 
+class CatalogueChoiceIterator(ModelChoiceIterator):
+    """Варианты выбора группы из каталога, без запроса к базе."""
+
+    def __iter__(self):
+        if self.field.empty_label is not None:
+            yield ('', self.field.empty_label)
+        for group in group_catalogue():
+            yield (group.id, group.title)
+
+    def __len__(self):
+        return (
+            len(group_catalogue())
+            + (self.field.empty_label is not None)
+        )
+
+
 class PostForm(ModelForm):
 
     class Meta:
@@ -14,6 +32,14 @@ class PostForm(ModelForm):
             "image": "Картинка"
         }
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # тип поля остаётся ModelChoiceField: проверка значения по-прежнему
+        # идёт через queryset, а список для <select> берётся из каталога
+        group = self.fields['group']
+        group.iterator = CatalogueChoiceIterator
+        group.widget.choices = group.choices
+
 
 class CommentForm(ModelForm):
     class Meta:
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from posts.sitemaps import ensure_chunk, sitemap_chunks
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересобирает устаревшие куски sitemap в SITEMAP_ROOT; '
+        '--force пересобирает все.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true')
+
+    def handle(self, *args, **options):
+        rebuilt = 0
+        for section, number in sitemap_chunks():
+            path, changed = ensure_chunk(section, number, options['force'])
+            if changed:
+                rebuilt += 1
+                self.stdout.write(f'  {path}')
+        self.stdout.write(f'Пересобрано кусков: {rebuilt}')
@@ -0,0 +1,42 @@
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+
+from posts.cards import post_cards
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает время и память на выборку страницы ленты '
+        'экземплярами Post и карточками PostCard.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100)
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        rows, repeat = options['rows'], options['repeat']
+        variants = (
+            ('Post', lambda: Post.objects.select_related('author', 'group')),
+            ('PostCard', lambda: post_cards(Post.objects.all())),
+        )
+        for name, queryset in variants:
+            self.report(name, queryset, rows, repeat)
+
+    def report(self, name, queryset, rows, repeat):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            page = list(queryset()[:rows])
+        elapsed = (time.perf_counter() - started) / repeat
+        tracemalloc.start()
+        page = list(queryset()[:rows])
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        self.stdout.write(
+            f'{name:>8}: {len(page)} строк, '
+            f'{elapsed * 1000:7.3f} мс на страницу, '
+            f'пик памяти {peak / 1024:8.1f} КиБ'
+        )
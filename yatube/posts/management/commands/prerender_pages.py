@@ -0,0 +1,29 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.prerender import all_targets, prerender
+
+
+class Command(BaseCommand):
+    help = (
+        'Рисует страницы групп и профилей в PRERENDER_ROOT. Без аргументов '
+        '— все, иначе только указанные группы и авторы.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--group', action='append', default=[])
+        parser.add_argument('--profile', action='append', default=[])
+
+    def handle(self, *args, **options):
+        if not settings.PRERENDER_ROOT:
+            raise CommandError('PRERENDER_ROOT не задан')
+        targets = (
+            [('group', slug) for slug in options['group']]
+            + [('profile', username) for username in options['profile']]
+        ) or all_targets()
+        total = 0
+        for kind, key in targets:
+            pages = prerender(kind, key)
+            total += pages
+            self.stdout.write(f'  {kind}/{key}: страниц {pages}')
+        self.stdout.write(f'Нарисовано страниц: {total}')
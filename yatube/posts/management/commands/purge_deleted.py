@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts.bulk import BATCH_SIZE, purge_deleted
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет насовсем мягко удалённые посты и комментарии старше '
+        'срока хранения. Запускается по расписанию (cron).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=settings.SOFT_DELETE_RETENTION_DAYS
+        )
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        posts, comments = purge_deleted(
+            options['days'],
+            progress=lambda rows: self.stdout.write(f'  удалено {rows}'),
+            batch_size=options['batch_size'],
+        )
+        self.stdout.write(
+            f'Удалено постов: {posts}, комментариев: {comments}'
+        )
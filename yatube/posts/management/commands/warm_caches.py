@@ -0,0 +1,63 @@
+from functools import partial
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.cache import is_shared
+from posts.warmup import (Fetcher, make_thumbnail, thumbnail_posts, warm_up,
+                          warmup_paths)
+
+
+class Command(BaseCommand):
+    help = (
+        'Прогревает кэши после выкладки: запрашивает первые страницы ленты, '
+        'крупных групп, популярных профилей и постов и делает недостающие '
+        'миниатюры, не больше --concurrency задач одновременно.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=4)
+        parser.add_argument('--pages', type=int, default=3)
+        parser.add_argument('--groups', type=int, default=10)
+        parser.add_argument('--profiles', type=int, default=20)
+        parser.add_argument('--posts', type=int, default=50)
+        parser.add_argument('--thumbnails', type=int, default=200)
+        parser.add_argument(
+            '--base-url',
+            help=(
+                'Запрашивать страницы у работающего сайта по HTTP. Каждый '
+                'запрос прогревает общий кэш и локальный LRU одного воркера. '
+                'Без него страницы прогреваются внутри процесса, только '
+                'если кэш default общий.'
+            ),
+        )
+
+    def handle(self, *args, **options):
+        if options['concurrency'] < 1:
+            raise CommandError('--concurrency должен быть не меньше 1')
+        fetch = Fetcher(options['base_url'])
+        paths = []
+        if options['base_url'] or is_shared():
+            paths = warmup_paths(
+                options['pages'], options['groups'],
+                options['profiles'], options['posts'],
+            )
+        else:
+            self.stderr.write(
+                'Страницы не прогреты: кэш default живёт в памяти этого '
+                'процесса и пропадёт вместе с ним. Укажите --base-url или '
+                'общий кэш (MEMCACHED_LOCATION).'
+            )
+        jobs = [(path, partial(fetch, path)) for path in paths] + [
+            (f'миниатюра поста {pk}', partial(make_thumbnail, image))
+            for pk, image in thumbnail_posts(options['thumbnails'])
+        ]
+        failed = 0
+        for name, result, elapsed in warm_up(jobs, options['concurrency']):
+            if isinstance(result, Exception):
+                failed += 1
+                self.stderr.write(f'  {name}: {result}')
+            elif options['verbosity'] > 1:
+                self.stdout.write(f'  {name}: {elapsed * 1000:.0f} мс')
+        self.stdout.write(
+            f'Прогрето {len(jobs) - failed} из {len(jobs)}, ошибок {failed}'
+        )
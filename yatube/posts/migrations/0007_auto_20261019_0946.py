@@ -0,0 +1,47 @@
+# Generated by Django 2.2.16 on 2026-10-19 09:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0006_auto_20261019_0929'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Удалено'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Удалено'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(condition=models.Q(deleted_at__isnull=True), fields=['post', '-created'], name='comment_live_post_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(condition=models.Q(deleted_at__isnull=False), fields=['deleted_at'], name='comment_deleted_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(deleted_at__isnull=True), fields=['-pub_date'], name='post_live_pub_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(deleted_at__isnull=True), fields=['author', '-pub_date'], name='post_live_author_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(deleted_at__isnull=True), fields=['group', '-pub_date'], name='post_live_group_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(deleted_at__isnull=False), fields=['deleted_at'], name='post_deleted_at_idx'),
+        ),
+    ]
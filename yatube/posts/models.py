@@ -1,8 +1,40 @@
 from django.db import models
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 
 User = get_user_model()
 
+LIVE = models.Q(deleted_at__isnull=True)
+DELETED = models.Q(deleted_at__isnull=False)
+
+
+class LiveManager(models.Manager):
+    """Только неудалённые строки."""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(LIVE)
+
+
+class SoftDeleteModel(models.Model):
+    """
+    Мягкое удаление: строка получает deleted_at и пропадает из objects
+    (и из связанных менеджеров вроде author.posts), но остаётся в
+    all_objects, пока её не удалит команда purge_deleted.
+    """
+    deleted_at = models.DateTimeField(
+        'Удалено', null=True, blank=True, editable=False
+    )
+
+    objects = LiveManager()
+    all_objects = models.Manager()
+
+    class Meta:
+        abstract = True
+
+    def soft_delete(self):
+        self.deleted_at = timezone.now()
+        self.save(update_fields=['deleted_at'])
+
 
 class Group(models.Model):
     title = models.CharField(max_length=200)
@@ -16,7 +48,7 @@ class Group(models.Model):
         return f'{self.title}'
 
 
-class Post(models.Model):
+class Post(SoftDeleteModel):
     text = models.TextField()
     pub_date = models.DateTimeField(auto_now_add=True)
     author = models.ForeignKey(
@@ -35,7 +67,9 @@ class Post(models.Model):
         'Картинка',
         upload_to='posts/',
         blank=True,
-        null=True
+        null=True,
+        # по имени файла вьюха media проверяет, что картинка принадлежит посту
+        db_index=True
     )
 
     def __str__(self):
@@ -43,9 +77,28 @@ class Post(models.Model):
 
     class Meta:
         ordering = ('-pub_date', )
-
-
-class Comment(models.Model):
+        # ленты читают только живые посты, индексы — только по ним
+        indexes = [
+            models.Index(
+                fields=['-pub_date'], condition=LIVE,
+                name='post_live_pub_date_idx',
+            ),
+            models.Index(
+                fields=['author', '-pub_date'], condition=LIVE,
+                name='post_live_author_idx',
+            ),
+            models.Index(
+                fields=['group', '-pub_date'], condition=LIVE,
+                name='post_live_group_idx',
+            ),
+            models.Index(
+                fields=['deleted_at'], condition=DELETED,
+                name='post_deleted_at_idx',
+            ),
+        ]
+
+
+class Comment(SoftDeleteModel):
     post = models.ForeignKey(
         Post,
         on_delete=models.CASCADE,
@@ -71,6 +124,16 @@ class Comment(models.Model):
         ordering = ['-created']
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
+        indexes = [
+            models.Index(
+                fields=['post', '-created'], condition=LIVE,
+                name='comment_live_post_idx',
+            ),
+            models.Index(
+                fields=['deleted_at'], condition=DELETED,
+                name='comment_deleted_at_idx',
+            ),
+        ]
 
 
 class Follow(models.Model):
@@ -99,3 +162,29 @@ class Follow(models.Model):
         return (f'Пользователь {self.user}'
                 f'подписан на пользователя {self.author}'
                 )
+
+
+class GroupFollow(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='group_follows',
+        verbose_name='Подписчик'
+    )
+    group = models.ForeignKey(
+        Group,
+        on_delete=models.CASCADE,
+        related_name='followers',
+        verbose_name='Группа'
+    )
+
+    class Meta:
+        verbose_name = 'Подписка на группу'
+        verbose_name_plural = 'Подписки на группы'
+        constraints = [models.UniqueConstraint(
+            fields=['user', 'group'],
+            name='unique_group_follow'
+        )]
+
+    def __str__(self):
+        return f'Пользователь {self.user} подписан на группу {self.group}'
@@ -0,0 +1,50 @@
+"""
+Версии страниц для кэша страниц гостей (core.middleware.page_cache).
+
+Версия страницы собирается только из наборов, которые она показывает:
+новый комментарий сбрасывает страницу одного поста, а не все страницы
+сайта. Кроме своего набора каждая страница зависит от 'groups' (названия
+групп в карточках) и 'accounts' (видимые изменения пользователей: имя,
+скрытие аккаунта). Число постов автора на странице поста не входит в её
+версию и обновляется при перерисовке по FRESH_TIMEOUT.
+"""
+from .cache import versions
+from .cards import get_author
+from .catalogue import group_catalogue
+
+COMMON_SCOPES = ('groups', 'accounts')
+
+
+def index_scopes(kwargs):
+    return ['index']
+
+
+def group_scopes(kwargs):
+    group = group_catalogue().by_slug.get(kwargs['slug'])
+    return [f'group:{group.id}'] if group else []
+
+
+def profile_scopes(kwargs):
+    author = get_author(kwargs['username'])
+    # неизвестный автор: 404 не кэшируется, но новый автор меняет 'users'
+    return [f'author:{author.id}'] if author else ['users']
+
+
+def post_scopes(kwargs):
+    return [f'post:{kwargs["post_id"]}']
+
+
+VIEW_SCOPES = {
+    'posts:index': index_scopes,
+    'posts:group_list': group_scopes,
+    'posts:profile': profile_scopes,
+    'posts:post_detail': post_scopes,
+}
+
+
+def page_version(view_name, kwargs):
+    """Версия страницы view_name; None — для вьюхи без описания."""
+    scopes = VIEW_SCOPES.get(view_name)
+    if scopes is None:
+        return None
+    return versions(*scopes(kwargs), *COMMON_SCOPES)
@@ -0,0 +1,207 @@
+"""
+Готовые HTML-файлы страниц групп и профилей для CDN или файлового
+сервера.
+
+Первые PRERENDER_PAGES страниц каждой группы и каждого автора
+рисуются теми же вьюхами, что и для гостя, и пишутся в PRERENDER_ROOT:
+  group/<slug>/index.html, group/<slug>/page-<n>.html
+  profile/<username>/index.html, profile/<username>/page-<n>.html
+(в nginx: try_files /group/$slug/page-$arg_page.html ...). Все страницы
+пишет команда prerender_pages. После изменения постов перерисовываются
+только их группы и авторы: всё, что изменила одна транзакция, рисует
+один фоновый поток после коммита. Без PRERENDER_ROOT всё выключено.
+"""
+import os
+import shutil
+import tempfile
+import threading
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.db import connection, transaction
+from django.http import Http404
+
+from .catalogue import get_group, group_catalogue
+from .models import Post, User
+from .utils import CachedCountPaginator
+from .views import COUNT_OF_POSTS, group_posts, profile
+
+FILE_MODE = 0o644
+TMP_SUFFIX = '.tmp'
+
+
+def group_pages(slug):
+    group = group_catalogue().by_slug.get(slug)
+    if group is None:
+        return 0
+    posts = Post.objects.filter(group_id=group.id, author__is_active=True)
+    return page_count(posts, f'group:{group.id}')
+
+
+def profile_pages(username):
+    author = User.objects.filter(username=username, is_active=True).first()
+    if author is None:
+        return 0
+    return page_count(author.posts.all(), f'author:{author.pk}')
+
+
+def page_count(posts, feed):
+    paginator = CachedCountPaginator(posts, COUNT_OF_POSTS, feed=feed)
+    return min(paginator.num_pages, settings.PRERENDER_PAGES)
+
+
+# вид страницы: (вьюха, сколько страниц рисовать)
+TARGETS = {
+    'group': (group_posts, group_pages),
+    'profile': (profile, profile_pages),
+}
+
+
+def target_dir(kind, key):
+    return os.path.join(settings.PRERENDER_ROOT, kind, key)
+
+
+def page_filename(number):
+    return 'index.html' if number == 1 else f'page-{number}.html'
+
+
+def render_page(kind, key, number):
+    """HTML страницы так, как её видит гость."""
+    # django.test тянет unittest и http.server — не грузим его при старте
+    from django.test import RequestFactory
+
+    view, _ = TARGETS[kind]
+    request = RequestFactory(SERVER_NAME=settings.ALLOWED_HOSTS[0]).get(
+        '/', {'page': number}
+    )
+    request.user = AnonymousUser()
+    return view(request, key).content
+
+
+def write_file(path, content):
+    # пишем рядом и подменяем: сервер не отдаст недописанный файл.
+    # Имя временного файла своё у каждого потока, а не только процесса
+    with tempfile.NamedTemporaryFile(
+        dir=os.path.dirname(path), suffix=TMP_SUFFIX, delete=False
+    ) as page:
+        try:
+            page.write(content)
+        except BaseException:
+            os.remove(page.name)
+            raise
+    # NamedTemporaryFile создаётся с правами 0600, а читает файлы nginx
+    os.chmod(page.name, FILE_MODE)
+    os.replace(page.name, path)
+
+
+def prerender(kind, key):
+    """
+    Перерисовывает страницы группы или автора и убирает лишние файлы.
+    Возвращает число записанных страниц.
+    """
+    _, pages = TARGETS[kind]
+    # username вроде '..' не должен уводить запись из PRERENDER_ROOT
+    if key in ('.', '..') or os.sep in key:
+        return 0
+    directory = target_dir(kind, key)
+    try:
+        count = pages(key)
+        written = [
+            (page_filename(number), render_page(kind, key, number))
+            for number in range(1, count + 1)
+        ]
+    except Http404:
+        written = []
+    if not written:
+        # группы или автора больше нет — файлы тоже не нужны
+        shutil.rmtree(directory, ignore_errors=True)
+        return 0
+    os.makedirs(directory, exist_ok=True)
+    for filename, content in written:
+        write_file(os.path.join(directory, filename), content)
+    names = {filename for filename, _ in written}
+    for filename in os.listdir(directory):
+        # чужой *.tmp — файл, который ещё пишет другой поток
+        if filename not in names and not filename.endswith(TMP_SUFFIX):
+            os.remove(os.path.join(directory, filename))
+    return len(written)
+
+
+def all_targets():
+    for group in group_catalogue():
+        yield 'group', group.slug
+    usernames = User.objects.filter(
+        is_active=True, posts__isnull=False
+    ).distinct().values_list('username', flat=True)
+    for username in usernames.iterator():
+        yield 'profile', username
+
+
+def post_targets(author_ids, group_ids):
+    """Страницы, на которых видны посты этих авторов и групп."""
+    targets = []
+    for group_id in group_ids:
+        group = get_group(group_id)
+        if group is not None:
+            targets.append(('group', group.slug))
+    usernames = User.objects.filter(pk__in=author_ids).values_list(
+        'username', flat=True
+    )
+    targets.extend(('profile', username) for username in usernames)
+    return targets
+
+
+class PendingPrerender:
+    """
+    Авторы и группы, посты которых изменила текущая транзакция. Один
+    объект на транзакцию регистрируется в on_commit и после коммита
+    перерисовывает все их страницы одним фоновым потоком.
+    """
+
+    def __init__(self):
+        self.author_ids = set()
+        self.group_ids = set()
+
+    def __call__(self):
+        threading.Thread(
+            target=prerender_in_thread,
+            args=(self.author_ids, self.group_ids),
+            daemon=True,
+        ).start()
+
+
+def registered_pending():
+    """PendingPrerender текущей транзакции, если он уже в on_commit."""
+    # при откате Django очищает run_on_commit, и следующее изменение
+    # зарегистрирует новый объект
+    for entry in transaction.get_connection().run_on_commit:
+        if isinstance(entry[1], PendingPrerender):
+            return entry[1]
+    return None
+
+
+def prerender_posts_change(author_ids, group_ids):
+    """
+    Перерисовать после коммита страницы авторов и групп изменённых
+    постов. Зовут posts.signals, массовые правки posts.bulk и удаление
+    аккаунта users.deletion.
+    """
+    if not settings.PRERENDER_ROOT:
+        return
+    pending = registered_pending()
+    registered = pending is not None
+    if not registered:
+        pending = PendingPrerender()
+    pending.author_ids.update(author_ids)
+    pending.group_ids.update(pk for pk in group_ids if pk is not None)
+    # вне транзакции on_commit вызывает сразу — наборы уже заполнены
+    if not registered:
+        transaction.on_commit(pending)
+
+
+def prerender_in_thread(author_ids, group_ids):
+    try:
+        for kind, key in post_targets(author_ids, group_ids):
+            prerender(kind, key)
+    finally:
+        connection.close()
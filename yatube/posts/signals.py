@@ -0,0 +1,76 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .cache import bump_version
+from .models import Comment, Group, Post, User
+from .prerender import prerender_posts_change
+from .sitemaps import chunk_scope
+
+
+def post_scopes(post, group_ids=()):
+    """Наборы постов, в которые входит пост."""
+    scopes = [
+        'index', f'author:{post.author_id}', f'post:{post.pk}',
+        chunk_scope('posts', post.pk),
+    ]
+    for group_id in {post.group_id, *group_ids}:
+        if group_id is not None:
+            scopes.append(f'group:{group_id}')
+    return scopes
+
+
+@receiver(pre_save, sender=Post)
+def remember_previous_group(sender, instance, **kwargs):
+    # post_edit может перенести пост в другую группу:
+    # старую группу тоже нужно сбросить
+    instance._previous_group_id = (
+        Post.all_objects.filter(pk=instance.pk)
+        .values_list('group_id', flat=True)
+        .first()
+        if instance.pk else None
+    )
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def bump_post_versions(sender, instance, **kwargs):
+    previous = getattr(instance, '_previous_group_id', None)
+    bump_version(*post_scopes(instance, (previous,)))
+    prerender_posts_change(
+        {instance.author_id}, {instance.group_id, previous}
+    )
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def bump_groups_version(sender, instance, **kwargs):
+    # название и slug группы выводятся в карточках постов всех лент
+    bump_version('groups', f'group:{instance.pk}')
+
+
+@receiver(post_save, sender=User)
+def bump_author_version(sender, instance, created, update_fields, **kwargs):
+    # вход пользователя обновляет только last_login — это не видно в ленте
+    if update_fields == frozenset({'last_login'}):
+        return
+    # 'users' — поиск автора по username (posts.cards.get_author);
+    # новый пользователь ещё нигде не показан, страниц не сбрасывает
+    if created:
+        bump_version('users', chunk_scope('profiles', instance.pk))
+        return
+    # 'accounts' — имя и видимость автора на всех страницах гостей
+    bump_version(
+        'users', 'accounts', f'author:{instance.pk}',
+        chunk_scope('profiles', instance.pk),
+    )
+
+
+@receiver(post_delete, sender=User)
+def bump_users_version(sender, instance, **kwargs):
+    bump_version('users', 'accounts', chunk_scope('profiles', instance.pk))
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def bump_comment_versions(sender, instance, **kwargs):
+    bump_version(f'post:{instance.post_id}')
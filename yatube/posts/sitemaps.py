@@ -0,0 +1,167 @@
+"""
+Sitemap для миллионов постов: индекс и куски по CHUNK_SIZE адресов.
+
+Кусок покрывает фиксированный диапазон id (посты и профили) и лежит
+файлом в SITEMAP_ROOT. В первой строке после заголовка записана версия
+куска (posts.cache): сигналы увеличивают версию только того куска, где
+изменился пост или пользователь, поэтому пересобираются лишь устаревшие
+куски. Строки выбираются через .iterator() и пишутся в файл потоком.
+"""
+import os
+import tempfile
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import Max
+from django.urls import reverse
+
+from .cache import get_version
+from .catalogue import group_catalogue
+from .models import Post
+
+User = get_user_model()
+
+CHUNK_SIZE = 50000
+ITERATOR_CHUNK_SIZE = 2000
+SECTIONS = ('posts', 'profiles', 'groups')
+FILE_MODE = 0o644
+XML_HEADER = '<?xml version="1.0" encoding="UTF-8"?>\n'
+VERSION_LINE = '<!-- version {} -->\n'
+URLSET_OPEN = (
+    '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+)
+
+
+def chunk_scope(section, pk=0):
+    """Версия куска, в который попадает объект с этим id."""
+    if section == 'groups':
+        return 'groups'
+    return f'sitemap:{section}:{pk // CHUNK_SIZE}'
+
+
+def chunk_path(section, number):
+    return os.path.join(
+        settings.SITEMAP_ROOT, f'sitemap-{section}-{number}.xml'
+    )
+
+
+def id_range(number):
+    return number * CHUNK_SIZE, (number + 1) * CHUNK_SIZE
+
+
+def post_urls(number):
+    start, end = id_range(number)
+    rows = Post.objects.filter(
+        pk__gte=start, pk__lt=end, author__is_active=True
+    ).order_by('pk').values_list('pk', 'pub_date')
+    for pk, pub_date in rows.iterator(chunk_size=ITERATOR_CHUNK_SIZE):
+        yield (
+            reverse('posts:post_detail', kwargs={'post_id': pk}),
+            pub_date,
+        )
+
+
+def profile_urls(number):
+    start, end = id_range(number)
+    usernames = User.objects.filter(
+        pk__gte=start, pk__lt=end, is_active=True
+    ).order_by('pk').values_list('username', flat=True)
+    for username in usernames.iterator(chunk_size=ITERATOR_CHUNK_SIZE):
+        yield reverse('posts:profile', kwargs={'username': username}), None
+
+
+def group_urls(number):
+    for group in group_catalogue():
+        yield reverse('posts:group_list', kwargs={'slug': group.slug}), None
+
+
+URL_SOURCES = {
+    'posts': post_urls,
+    'profiles': profile_urls,
+    'groups': group_urls,
+}
+
+
+def sitemap_chunks():
+    """(раздел, номер) всех кусков: по максимальному id в таблице."""
+    chunks = [('groups', 0)]
+    for section, model in (('posts', Post), ('profiles', User)):
+        max_pk = model.objects.aggregate(max_pk=Max('pk'))['max_pk'] or 0
+        chunks.extend(
+            (section, number) for number in range(max_pk // CHUNK_SIZE + 1)
+        )
+    return chunks
+
+
+def built_version(path):
+    try:
+        with open(path, encoding='utf-8') as sitemap:
+            sitemap.readline()
+            return sitemap.readline()
+    except FileNotFoundError:
+        return None
+
+
+def write_chunk(section, number, version):
+    path = chunk_path(section, number)
+    os.makedirs(settings.SITEMAP_ROOT, exist_ok=True)
+    # пишем рядом и подменяем: читатель не увидит недописанный файл.
+    # Имя временного файла своё у каждого потока: один кусок могут
+    # собирать одновременно несколько запросов
+    base_url = settings.SITEMAP_BASE_URL.rstrip('/')
+    with tempfile.NamedTemporaryFile(
+        'w', encoding='utf-8', dir=settings.SITEMAP_ROOT,
+        suffix='.tmp', delete=False,
+    ) as sitemap:
+        try:
+            sitemap.write(XML_HEADER + VERSION_LINE.format(version))
+            sitemap.write(URLSET_OPEN)
+            for location, lastmod in URL_SOURCES[section](number):
+                sitemap.write(
+                    f'<url><loc>{escape(base_url + location)}</loc>'
+                )
+                if lastmod is not None:
+                    sitemap.write(f'<lastmod>{lastmod.date().isoformat()}'
+                                  '</lastmod>')
+                sitemap.write('</url>\n')
+            sitemap.write('</urlset>\n')
+        except BaseException:
+            os.remove(sitemap.name)
+            raise
+    # NamedTemporaryFile создаётся с правами 0600
+    os.chmod(sitemap.name, FILE_MODE)
+    os.replace(sitemap.name, path)
+
+
+def ensure_chunk(section, number, force=False):
+    """
+    Путь к актуальному куску; пересобирает его, если версия сменилась.
+    Возвращает (путь, пересобран ли).
+    """
+    path = chunk_path(section, number)
+    version = get_version(chunk_scope(section, number * CHUNK_SIZE))
+    if not force and built_version(path) == VERSION_LINE.format(version):
+        return path, False
+    write_chunk(section, number, version)
+    return path, True
+
+
+def sitemap_index():
+    """XML индекса со ссылками на все куски."""
+    base_url = settings.SITEMAP_BASE_URL.rstrip('/')
+    lines = [
+        XML_HEADER,
+        '<sitemapindex '
+        'xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n',
+    ]
+    for section, number in sitemap_chunks():
+        location = reverse(
+            'posts:sitemap_chunk',
+            kwargs={'section': section, 'number': number},
+        )
+        lines.append(
+            f'<sitemap><loc>{escape(base_url + location)}</loc></sitemap>\n'
+        )
+    lines.append('</sitemapindex>\n')
+    return ''.join(lines)
@@ -0,0 +1,11 @@
+from django import template
+
+from posts.catalogue import get_group
+
+register = template.Library()
+
+
+@register.filter
+def group_ref(group_id):
+    """Группа поста из каталога вместо запроса за post.group."""
+    return get_group(group_id)
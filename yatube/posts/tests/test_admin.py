@@ -0,0 +1,164 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.bulk import delete_posts
+from posts.models import Comment, Follow, Group, Post, User
+
+
+class AdminChangelistTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass'
+        )
+        cls.groups = [
+            Group.objects.create(title=f'Группа {i}', slug=f'group-{i}')
+            for i in range(3)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        self.admin_client = Client()
+        self.admin_client.force_login(self.admin)
+
+    def create_posts(self, count):
+        start = User.objects.count()
+        for i in range(start, start + count):
+            author = User.objects.create_user(username=f'author{i}')
+            post = Post.objects.create(
+                author=author, text=f'Пост {i}', group=self.groups[i % 3]
+            )
+            Comment.objects.create(post=post, author=author, text='Ок')
+            Follow.objects.create(user=self.admin, author=author)
+
+    def count_queries(self, url):
+        self.admin_client.get(url)
+        with CaptureQueriesContext(connection) as context:
+            response = self.admin_client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(context)
+
+    def test_queries_do_not_grow_with_rows(self):
+        """Число запросов списка не зависит от числа строк."""
+        for name in ('post', 'comment', 'follow'):
+            url = reverse(f'admin:posts_{name}_changelist')
+            with self.subTest(url=url):
+                self.create_posts(2)
+                few = self.count_queries(url)
+                self.create_posts(6)
+                self.assertEqual(self.count_queries(url), few)
+
+    def test_cursor_navigation(self):
+        """«Следующие» продолжают список с pk меньше последнего."""
+        self.create_posts(150)
+        url = reverse('admin:posts_post_changelist')
+        response = self.admin_client.get(url)
+        page = list(response.context['cl'].result_list)
+        next_query = response.context['cl'].next_cursor_query
+        self.assertEqual(next_query, f'?before={page[-1].pk}')
+        response = self.admin_client.get(url + next_query)
+        self.assertEqual(
+            [post.pk for post in response.context['cl'].result_list],
+            list(
+                Post.objects.filter(pk__lt=page[-1].pk)
+                .order_by('-pk').values_list('pk', flat=True)[:100]
+            ),
+        )
+        self.assertIsNone(response.context['cl'].next_cursor_query)
+
+
+class AdminBulkActionsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass'
+        )
+        cls.spammer = User.objects.create_user(username='spammer')
+        cls.author = User.objects.create_user(username='leo')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        cls.url = reverse('admin:posts_post_changelist')
+
+    def setUp(self):
+        cache.clear()
+        self.admin_client = Client()
+        self.admin_client.force_login(self.admin)
+        self.spam = [
+            Post.objects.create(author=self.spammer, text=f'Спам {i}')
+            for i in range(5)
+        ]
+        self.post = Post.objects.create(author=self.author, text='Пост')
+        Comment.objects.create(
+            post=self.spam[0], author=self.author, text='Ответ'
+        )
+
+    def run_action(self, action, posts, **data):
+        return self.admin_client.post(self.url, {
+            'action': action,
+            '_selected_action': [post.pk for post in posts],
+            **data,
+        })
+
+    def test_action_asks_confirmation(self):
+        response = self.run_action('delete_selected_posts', self.spam[:1])
+        self.assertTemplateUsed(response, 'admin/posts/bulk_confirmation.html')
+        self.assertEqual(Post.objects.count(), 6)
+
+    def test_move_to_group_resets_group_cache(self):
+        """Перенос в группу сразу виден на странице группы."""
+        group_url = reverse('posts:group_list', kwargs={'slug': 'group'})
+        self.admin_client.get(group_url)
+        self.run_action(
+            'move_to_group', [self.post], apply='1', group=self.group.pk
+        )
+        self.assertEqual(Post.objects.get(pk=self.post.pk).group, self.group)
+        self.assertContains(self.admin_client.get(group_url), 'Пост')
+        self.run_action('clear_group', [self.post], apply='1')
+        self.assertIsNone(Post.objects.get(pk=self.post.pk).group)
+        self.assertNotContains(self.admin_client.get(group_url), 'Пост')
+
+    def test_delete_author_posts(self):
+        """Все посты автора удаляются мягко, строки остаются до purge."""
+        response = self.run_action(
+            'delete_author_posts', self.spam[:1], apply='1'
+        )
+        self.assertRedirects(response, self.url)
+        self.assertEqual(list(Post.objects.all()), [self.post])
+        self.assertEqual(
+            Post.all_objects.filter(deleted_at__isnull=False).count(), 5
+        )
+
+    def test_deleted_posts_listed_and_restored(self):
+        """Удалённые посты видны с фильтром и восстанавливаются."""
+        detail = reverse('posts:post_detail', args=[self.post.pk])
+        self.run_action('delete_selected_posts', [self.post], apply='1')
+        self.assertEqual(self.client.get(detail).status_code, 404)
+        response = self.admin_client.get(self.url, {'deleted': 'yes'})
+        self.assertEqual(
+            list(response.context['cl'].result_list), [self.post]
+        )
+        self.run_action('restore_posts', [self.post], apply='1')
+        self.assertIsNone(Post.objects.get(pk=self.post.pk).deleted_at)
+        self.assertContains(self.client.get(detail), 'Пост')
+
+    def test_delete_from_change_page_is_soft(self):
+        url = reverse('admin:posts_post_delete', args=[self.post.pk])
+        self.admin_client.post(url, {'post': 'yes'})
+        self.assertFalse(Post.objects.filter(pk=self.post.pk).exists())
+        self.assertIsNotNone(
+            Post.all_objects.get(pk=self.post.pk).deleted_at
+        )
+
+    def test_batches(self):
+        progress = []
+        deleted = delete_posts(
+            Post.objects.filter(author=self.spammer), progress.append,
+            batch_size=2,
+        )
+        self.assertEqual(deleted, 5)
+        self.assertEqual(progress, [2, 4, 5])
+        self.assertFalse(Comment.all_objects.exists())
@@ -0,0 +1,191 @@
+import hashlib
+
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from core import metrics
+from posts.models import Comment, Follow, Group, Post, User
+
+
+class ProfileCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='leo')
+        cls.group = Group.objects.create(
+            title='Группа поклонников графа',
+            slug='tolstoi',
+        )
+        cls.post = Post.objects.create(
+            author=cls.author,
+            text='Война и мир изначально назывался «1805 год»',
+            group=cls.group,
+        )
+        cls.url = reverse('posts:profile', kwargs={'username': 'leo'})
+
+    def setUp(self):
+        cache.clear()
+        self.follower = User.objects.create_user(username='HasNoName')
+        self.follower_client = Client()
+        self.follower_client.force_login(self.follower)
+
+    def test_cached_page_skips_post_queries(self):
+        """Повторный показ профиля не выбирает посты из БД."""
+        self.follower_client.get(self.url)
+        # остаются поиск автора, проверка подписки, сессия и пользователь
+        with self.assertNumQueries(4):
+            response = self.follower_client.get(self.url)
+        self.assertContains(response, self.post.text)
+
+    def test_post_changes_reset_cache(self):
+        """Создание, правка и удаление поста сразу видны в профиле."""
+        self.client.get(self.url)
+        post = Post.objects.create(author=self.author, text='Анна Каренина')
+        self.assertContains(self.client.get(self.url), 'Анна Каренина')
+        post.text = 'Воскресение'
+        post.save()
+        self.assertContains(self.client.get(self.url), 'Воскресение')
+        post.delete()
+        self.assertNotContains(self.client.get(self.url), 'Воскресение')
+
+    def test_follow_button_not_cached(self):
+        """Кнопка подписки считается для каждого зрителя отдельно."""
+        follow_url = reverse('posts:profile_follow', args=('leo',))
+        unfollow_url = reverse('posts:profile_unfollow', args=('leo',))
+        self.assertContains(self.follower_client.get(self.url), follow_url)
+        Follow.objects.create(user=self.follower, author=self.author)
+        response = self.follower_client.get(self.url)
+        self.assertContains(response, unfollow_url)
+        self.assertContains(Client().get(self.url), follow_url)
+
+
+class GroupCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='leo')
+        cls.group = Group.objects.create(title='Толстой', slug='tolstoi')
+        cls.other_group = Group.objects.create(
+            title='Чехов', slug='chekhov'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.post = Post.objects.create(
+            author=self.author,
+            text='Война и мир',
+            group=self.group,
+        )
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.author)
+
+    def group_page(self, group):
+        # гостям страницы целиком отдаёт AnonymousPageCacheMiddleware,
+        # кэш фрагментов проверяем на авторизованном клиенте
+        return self.authorized_client.get(
+            reverse('posts:group_list', kwargs={'slug': group.slug})
+        )
+
+    def test_cached_page_skips_post_queries(self):
+        """Повторный показ группы не выбирает посты из БД."""
+        self.group_page(self.group)
+        # группа берётся из каталога, посты — из кэша фрагмента,
+        # остаются проверка подписки на группу и сессия с пользователем
+        # (с LocMem они не кэшируются, см. users.backends)
+        with self.assertNumQueries(3):
+            response = self.group_page(self.group)
+        self.assertContains(response, 'Война и мир')
+
+    def test_post_edit_moves_post_between_groups(self):
+        """Перенос поста через post_edit сбрасывает обе группы."""
+        self.group_page(self.group)
+        self.group_page(self.other_group)
+        self.authorized_client.post(
+            reverse('posts:post_edit', kwargs={'post_id': self.post.pk}),
+            data={'text': 'Война и мир', 'group': self.other_group.pk},
+        )
+        self.assertNotContains(self.group_page(self.group), 'Война и мир')
+        self.assertContains(self.group_page(self.other_group), 'Война и мир')
+
+    def test_other_group_keeps_cache(self):
+        """Пост в одной группе не сбрасывает кэш другой."""
+        self.group_page(self.other_group)
+        Post.objects.create(
+            author=self.author, text='Анна Каренина', group=self.group
+        )
+        # подписка на группу, сессия и пользователь
+        with self.assertNumQueries(3):
+            self.group_page(self.other_group)
+
+
+class AnonymousPageCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='leo')
+        cls.staff = User.objects.create_user(username='admin', is_staff=True)
+        cls.url = reverse('posts:profile', kwargs={'username': 'leo'})
+
+    def setUp(self):
+        cache.clear()
+        Post.objects.create(author=self.author, text='Война и мир')
+        self.guest_client = Client()
+
+    def test_guest_page_cached(self):
+        """Повторный запрос гостя отдаётся без БД и шаблонов."""
+        self.guest_client.get(self.url)
+        with self.assertNumQueries(0):
+            response = self.guest_client.get(self.url)
+        self.assertContains(response, 'Война и мир')
+        self.assertIsNone(response.context)
+        counters = metrics.snapshot()
+        self.assertEqual(counters['page_cache_miss'], 1)
+        self.assertEqual(counters['page_cache_hit'], 1)
+
+    def test_stale_page_served_while_locked(self):
+        """Пока другой воркер перерисовывает страницу, гость получает
+        устаревшую копию, а после — свежую."""
+        self.guest_client.get(self.url)
+        Post.objects.create(author=self.author, text='Анна Каренина')
+        key = 'page_cache:' + hashlib.md5(self.url.encode()).hexdigest()
+        cache.add(key + ':lock', 1)
+        response = self.guest_client.get(self.url)
+        self.assertNotContains(response, 'Анна Каренина')
+        self.assertEqual(metrics.snapshot()['page_cache_stale'], 1)
+        cache.delete(key + ':lock')
+        self.assertContains(self.guest_client.get(self.url), 'Анна Каренина')
+
+    def test_page_version_follows_own_scopes(self):
+        """Комментарий сбрасывает только страницу своего поста."""
+        first, second = (
+            Post.objects.create(author=self.author, text=text)
+            for text in ('Детство', 'Отрочество')
+        )
+        first_url, second_url = (
+            reverse('posts:post_detail', args=[post.pk])
+            for post in (first, second)
+        )
+        for url in (self.url, first_url, second_url):
+            self.guest_client.get(url)
+        Comment.objects.create(post=first, author=self.staff, text='Юность')
+        with self.assertNumQueries(0):
+            self.guest_client.get(second_url)
+            self.guest_client.get(self.url)
+        self.assertContains(self.guest_client.get(first_url), 'Юность')
+
+    def test_authorized_user_not_cached(self):
+        authorized_client = Client()
+        authorized_client.force_login(self.author)
+        authorized_client.get(self.url)
+        response = authorized_client.get(self.url)
+        self.assertIsNotNone(response.context)
+
+    def test_metrics_only_for_staff(self):
+        self.guest_client.get(self.url)
+        staff_client = Client()
+        staff_client.force_login(self.staff)
+        response = staff_client.get(reverse('metrics'))
+        self.assertContains(response, 'yatube_page_cache_miss 1')
+        response = self.guest_client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 403)
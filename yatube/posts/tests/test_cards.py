@@ -0,0 +1,75 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from posts.cards import EXCERPT_LENGTH, AuthorRef, PostCard, post_cards
+from posts.models import Group, Post, User
+
+
+class PostCardTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.user, text='Тестовый пост', group=cls.group
+        )
+        Post.objects.create(author=cls.user, text='Пост без группы')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_cards_match_posts(self):
+        """Карточки несут поля поста и равны постам по pk."""
+        cards = list(post_cards(Post.objects.filter(pk=self.post.pk)))
+        self.assertEqual(cards, [self.post])
+        card = cards[0]
+        self.assertIsInstance(card, PostCard)
+        self.assertEqual(card.text, self.post.text)
+        self.assertEqual(card.pub_date, self.post.pub_date)
+        self.assertEqual(card.group, self.group)
+        self.assertIsInstance(card.author, AuthorRef)
+        self.assertEqual(card.author, self.user)
+        self.assertEqual(str(card.author), 'auth')
+
+    def test_page_in_one_query(self):
+        """Страница карточек с авторами и группами — один запрос."""
+        with self.assertNumQueries(1):
+            cards = list(post_cards(Post.objects.all())[:10])
+        self.assertEqual(len(cards), 2)
+        # автор у карточек одной страницы общий
+        self.assertIs(cards[0].author, cards[1].author)
+
+    def test_long_text_excerpt(self):
+        """Лента получает из базы только начало длинного поста."""
+        text = 'Слово ' * EXCERPT_LENGTH
+        post = Post.objects.create(author=self.user, text=text)
+        card = post_cards(Post.objects.filter(pk=post.pk)).get()
+        self.assertEqual(card.text, text[:EXCERPT_LENGTH])
+        self.assertTrue(card.is_truncated)
+        self.assertFalse(
+            post_cards(Post.objects.filter(pk=self.post.pk)).get()
+            .is_truncated
+        )
+        response = self.client.get(
+            reverse('posts:profile', kwargs={'username': 'auth'})
+        )
+        self.assertNotContains(response, text.strip())
+        self.assertContains(response, 'читать дальше')
+        response = self.client.get(
+            reverse('posts:post_detail', kwargs={'post_id': post.pk})
+        )
+        self.assertContains(response, text.strip())
+
+    def test_benchmark_command(self):
+        out = StringIO()
+        call_command('feed_benchmark', rows=2, repeat=1, stdout=out)
+        self.assertIn('PostCard', out.getvalue())
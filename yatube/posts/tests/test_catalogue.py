@@ -0,0 +1,76 @@
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.catalogue import GroupRef, get_group, group_catalogue
+from posts.forms import PostForm
+from posts.models import Group, Post, User
+
+
+class GroupCatalogueTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_form_choices_from_catalogue(self):
+        """Список групп в PostForm после прогрева не ходит в базу."""
+        group_catalogue()
+        with self.assertNumQueries(0):
+            choices = list(PostForm().fields['group'].choices)
+        self.assertEqual(
+            choices, [('', '---------'), (self.group.pk, self.group.title)]
+        )
+
+    def test_form_still_validates_group(self):
+        """Выбранная группа проверяется и сохраняется как раньше."""
+        form = PostForm(data={'text': 'Текст', 'group': self.group.pk})
+        self.assertTrue(form.is_valid())
+        self.assertEqual(form.cleaned_data['group'], self.group)
+        form = PostForm(data={'text': 'Текст', 'group': self.group.pk + 1})
+        self.assertFalse(form.is_valid())
+
+    def test_group_changes_reset_catalogue(self):
+        """Новая и переименованная группа сразу видны в каталоге."""
+        group_catalogue()
+        new = Group.objects.create(
+            title='Новая группа', slug='new', description='Описание'
+        )
+        self.assertEqual(get_group(new.pk).slug, 'new')
+        group = Group.objects.get(pk=self.group.pk)
+        group.title = 'Другое название'
+        group.save()
+        self.assertEqual(get_group(group.pk).title, 'Другое название')
+
+    def test_group_ref_equals_group(self):
+        ref = get_group(self.group.pk)
+        self.assertIsInstance(ref, GroupRef)
+        self.assertEqual(ref, self.group)
+        self.assertIsNone(get_group(None))
+
+    def test_unknown_slug_is_404(self):
+        response = self.authorized_client.get(
+            reverse('posts:group_list', kwargs={'slug': 'missing'})
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_post_card_group_link(self):
+        """Ссылка на группу в карточке поста строится по каталогу."""
+        Post.objects.create(author=self.user, text='Пост', group=self.group)
+        response = self.authorized_client.get(
+            reverse('posts:profile', kwargs={'username': 'auth'})
+        )
+        self.assertContains(
+            response,
+            reverse('posts:group_list', kwargs={'slug': 'test-slug'}),
+        )
@@ -0,0 +1,83 @@
+from django.test import TestCase
+from django.urls import reverse
+
+# tiered: clear() чистит и общий кэш, и LRU процесса
+from posts.cache import cache
+from posts.models import Group, Post, User
+
+
+class FeedsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='leo')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        cls.post = Post.objects.create(
+            author=cls.author, text='Война и мир', group=cls.group
+        )
+        cls.urls = (
+            reverse('posts:feed_rss'),
+            reverse('posts:feed_atom'),
+            reverse('posts:group_feed_rss', kwargs={'slug': 'group'}),
+            reverse('posts:group_feed_atom', kwargs={'slug': 'group'}),
+            reverse('posts:profile_feed_rss', kwargs={'username': 'leo'}),
+            reverse('posts:profile_feed_atom', kwargs={'username': 'leo'}),
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_feeds_list_posts(self):
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertContains(response, 'Война и мир')
+                self.assertTrue(response.has_header('ETag'))
+                self.assertFalse(response.has_header('Last-Modified'))
+
+    def test_conditional_poll_without_queries(self):
+        """Повторный опрос ленты — 304 без запросов к базе."""
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                with self.assertNumQueries(0):
+                    not_modified = self.client.get(
+                        url, HTTP_IF_NONE_MATCH=response['ETag']
+                    )
+                self.assertEqual(not_modified.status_code, 304)
+
+    def test_new_post_changes_feed(self):
+        url = reverse('posts:group_feed_rss', kwargs={'slug': 'group'})
+        etag = self.client.get(url)['ETag']
+        Post.objects.create(
+            author=self.author, text='Анна Каренина', group=self.group
+        )
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Анна Каренина')
+
+    def test_edited_post_changes_feed(self):
+        """Правка старого поста не даёт 304, хотя новых постов нет."""
+        url = reverse('posts:feed_rss')
+        etag = self.client.get(url)['ETag']
+        post = Post.objects.get(pk=self.post.pk)
+        post.text = 'Анна Каренина'
+        post.save()
+        response = self.client.get(
+            url,
+            HTTP_IF_NONE_MATCH=etag,
+            HTTP_IF_MODIFIED_SINCE='Fri, 01 Jan 2100 00:00:00 GMT',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Анна Каренина')
+
+    def test_unknown_feed_object(self):
+        for url in (
+            reverse('posts:group_feed_rss', kwargs={'slug': 'missing'}),
+            reverse('posts:profile_feed_rss', kwargs={'username': 'nobody'}),
+        ):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 404)
@@ -0,0 +1,96 @@
+import os
+import shutil
+import tempfile
+from http import HTTPStatus
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+
+from posts.models import Post, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class MediaViewTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='HasNoName')
+        cls.post = Post.objects.create(
+            text='Тестовый текст',
+            author=cls.user,
+            image=SimpleUploadedFile(
+                name='small.gif', content=SMALL_GIF, content_type='image/gif'
+            ),
+        )
+        cls.url = f'/media/{cls.post.image.name}'
+        with open(os.path.join(TEMP_MEDIA_ROOT, 'orphan.gif'), 'wb') as f:
+            f.write(SMALL_GIF)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def test_post_image_served(self):
+        """Картинка поста отдаётся целиком через FileResponse."""
+        response = self.guest_client.get(self.url)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(response['Content-Type'], 'image/gif')
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(b''.join(response.streaming_content), SMALL_GIF)
+
+    def test_range_request(self):
+        """Range отдаёт только запрошенные байты со статусом 206."""
+        response = self.guest_client.get(self.url, HTTP_RANGE='bytes=2-5')
+        self.assertEqual(response.status_code, HTTPStatus.PARTIAL_CONTENT)
+        self.assertEqual(
+            response['Content-Range'], f'bytes 2-5/{len(SMALL_GIF)}'
+        )
+        self.assertEqual(b''.join(response.streaming_content), SMALL_GIF[2:6])
+
+    def test_unsatisfiable_range(self):
+        response = self.guest_client.get(self.url, HTTP_RANGE='bytes=999-')
+        self.assertEqual(
+            response.status_code,
+            HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE
+        )
+
+    def test_foreign_files_not_served(self):
+        """Файлы без поста и выход за MEDIA_ROOT дают 404."""
+        for url in ('/media/orphan.gif', '/media/../settings.py'):
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    def test_public_prefix_does_not_hide_traversal(self):
+        """cache/../ не открывает файлы вне публичного префикса."""
+        self.post.soft_delete()
+        for name in ('orphan.gif', self.post.image.name):
+            with self.subTest(name=name):
+                response = self.guest_client.get(f'/media/cache/../{name}')
+                self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    @override_settings(MEDIA_SENDFILE_HEADER='X-Accel-Redirect')
+    def test_accel_redirect(self):
+        """За nginx Django отдаёт только заголовок X-Accel-Redirect."""
+        response = self.guest_client.get(self.url)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(
+            response['X-Accel-Redirect'],
+            f'/protected-media/{self.post.image.name}'
+        )
+        self.assertEqual(response.content, b'')
@@ -0,0 +1,109 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from posts.models import Group, Post, User
+from posts.utils import CachedCountPaginator
+
+
+class CachedCountPaginatorTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='HasNoName')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+        )
+        for x in range(5):
+            Post.objects.create(
+                author=cls.user,
+                text=f'Тестовый пост {x}',
+                group=cls.group,
+            )
+
+    def setUp(self):
+        cache.clear()
+
+    def paginator(self, posts, feed):
+        return CachedCountPaginator(posts, 2, feed=feed)
+
+    def test_count_is_cached(self):
+        """Повторный подсчёт ленты не делает COUNT(*)."""
+        feed = f'group:{self.group.pk}'
+        posts = self.group.groups.all()
+        self.assertEqual(self.paginator(posts, feed).count, 5)
+        with self.assertNumQueries(0):
+            count = self.paginator(self.group.groups.all(), feed).count
+        self.assertEqual(count, 5)
+
+    def test_new_post_resets_count(self):
+        """Новый пост в группе сбрасывает кэш счётчика группы."""
+        feed = f'group:{self.group.pk}'
+        self.paginator(self.group.groups.all(), feed).count
+        Post.objects.create(author=self.user, text='Ещё', group=self.group)
+        posts = self.group.groups.all()
+        self.assertEqual(self.paginator(posts, feed).count, 6)
+
+    @mock.patch('posts.utils.ESTIMATE_THRESHOLD', 3)
+    def test_large_feed_is_estimated(self):
+        """Ленты больше порога не считаются точно."""
+        paginator = self.paginator(self.group.groups.all(), 'test')
+        self.assertEqual(paginator.count, 4)
+        self.assertTrue(paginator.is_estimated)
+        # страница за оценкой не переносит на «последнюю»
+        self.assertEqual(paginator.get_page(7).number, 7)
+
+    @mock.patch('posts.utils.ESTIMATE_THRESHOLD', 3)
+    def test_unfiltered_feed_estimated_by_max_pk(self):
+        """Лента без фильтров оценивается по max(pk)."""
+        # Post.objects уже фильтрует удалённые, без фильтров — all_objects
+        paginator = self.paginator(Post.all_objects.all(), 'index')
+        self.assertEqual(
+            paginator.count, Post.objects.order_by('-pk').first().pk
+        )
+        self.assertTrue(paginator.is_estimated)
+
+    @mock.patch('posts.utils.ESTIMATE_THRESHOLD', 1)
+    def test_estimated_feed_pages_until_posts_end(self):
+        """За оценкой следующая страница есть, пока есть посты."""
+        paginator = CachedCountPaginator(self.group.groups.all(), 1, feed='t')
+        self.assertEqual(paginator.num_pages, 2)
+        page = paginator.get_page(4)
+        self.assertEqual(page.number, 4)
+        self.assertTrue(page.has_next())
+        self.assertEqual(page.next_page_number(), 5)
+        last = paginator.get_page(5)
+        self.assertEqual(len(last), 1)
+        self.assertFalse(last.has_next())
+
+    @mock.patch('posts.utils.ESTIMATE_THRESHOLD', 3)
+    def test_exact_count_behind_estimate(self):
+        """Подпись «Всего постов» точная и считается раз на версию."""
+        feed = f'author:{self.user.pk}'
+        paginator = self.paginator(self.user.posts.all(), feed)
+        self.assertEqual(paginator.count, 4)
+        self.assertTrue(paginator.is_estimated)
+        self.assertEqual(paginator.exact_count, 5)
+        with self.assertNumQueries(0):
+            paginator = self.paginator(self.user.posts.all(), feed)
+            self.assertEqual(paginator.exact_count, 5)
+
+    @mock.patch('posts.utils.ESTIMATE_THRESHOLD', 3)
+    def test_lower_bound_not_shown_as_estimate(self):
+        """«Из примерно N» — только для оценки по max(pk), не для порога."""
+        paginator = self.paginator(self.group.groups.all(), 'test')
+        self.assertEqual(paginator.count, 4)
+        self.assertTrue(paginator.is_lower_bound)
+        for x in range(10):
+            Post.objects.create(author=self.user, text=f'Ещё пост {x}')
+        index = self.client.get(reverse('posts:index'))
+        self.assertFalse(index.context['page_obj'].paginator.is_lower_bound)
+        self.assertContains(index, 'из примерно')
+        profile = self.client.get(
+            reverse('posts:profile', args=[self.user.username])
+        )
+        self.assertTrue(profile.context['page_obj'].paginator.is_estimated)
+        self.assertNotContains(profile, 'из примерно')
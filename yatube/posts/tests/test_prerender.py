@@ -0,0 +1,108 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+
+from posts.bulk import soft_delete_posts
+from posts.models import Group, Post, User
+from posts.prerender import PendingPrerender, post_targets, prerender
+
+TEMP_PRERENDER_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(PRERENDER_ROOT=TEMP_PRERENDER_ROOT, PRERENDER_PAGES=2)
+class PrerenderTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='leo')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_PRERENDER_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        shutil.rmtree(TEMP_PRERENDER_ROOT, ignore_errors=True)
+        for i in range(25):
+            Post.objects.create(
+                author=self.author, text=f'Пост номер {i}', group=self.group
+            )
+
+    def path(self, *parts):
+        return os.path.join(TEMP_PRERENDER_ROOT, *parts)
+
+    def test_command_writes_first_pages(self):
+        call_command('prerender_pages', stdout=StringIO())
+        for kind, key in (('group', 'group'), ('profile', 'leo')):
+            with self.subTest(kind=kind):
+                self.assertEqual(
+                    sorted(os.listdir(self.path(kind, key))),
+                    ['index.html', 'page-2.html'],
+                )
+        with open(self.path('group', 'group', 'index.html')) as page:
+            self.assertIn('Пост номер 24', page.read())
+        with open(self.path('group', 'group', 'page-2.html')) as page:
+            self.assertIn('Пост номер 14', page.read())
+
+    def test_stale_files_removed(self):
+        prerender('group', 'group')
+        Post.objects.filter(pk__in=Post.objects.all()[:20]).delete()
+        self.assertEqual(prerender('group', 'group'), 1)
+        self.assertEqual(
+            os.listdir(self.path('group', 'group')), ['index.html']
+        )
+        Group.objects.filter(pk=self.group.pk).delete()
+        self.assertEqual(prerender('group', 'group'), 0)
+        self.assertFalse(os.path.exists(self.path('group', 'group')))
+
+    def test_other_writers_temp_files_kept(self):
+        """Уборка не трогает *.tmp другого потока, файлы читаемы."""
+        prerender('group', 'group')
+        in_flight = self.path('group', 'group', 'index.html.abc.tmp')
+        with open(in_flight, 'wb'):
+            pass
+        prerender('group', 'group')
+        self.assertTrue(os.path.exists(in_flight))
+        mode = os.stat(self.path('group', 'group', 'index.html')).st_mode
+        self.assertEqual(mode & 0o777, 0o644)
+
+    def test_post_change_targets(self):
+        """После правки поста перерисовываются только его страницы."""
+        self.assertEqual(
+            post_targets({self.author.pk}, {self.group.pk}),
+            [('group', 'group'), ('profile', 'leo')],
+        )
+
+    def test_one_worker_per_transaction(self):
+        """Правки одной транзакции, в том числе массовые, рисует один
+        поток после коммита."""
+        other = Group.objects.create(title='Другая', slug='other')
+        writer = User.objects.create_user(username='tolstoy')
+        Post.objects.create(author=writer, text='Ещё', group=other)
+        soft_delete_posts(Post.objects.filter(author=self.author))
+        pending = [
+            entry[1] for entry in connection.run_on_commit
+            if isinstance(entry[1], PendingPrerender)
+        ]
+        self.assertEqual(len(pending), 1)
+        self.assertEqual(
+            pending[0].author_ids, {self.author.pk, writer.pk}
+        )
+        self.assertEqual(pending[0].group_ids, {self.group.pk, other.pk})
+        with mock.patch('posts.prerender.threading.Thread') as thread:
+            pending[0]()
+        thread.assert_called_once()
+
+    def test_unsafe_key_ignored(self):
+        self.assertEqual(prerender('profile', '..'), 0)
+        self.assertTrue(os.path.exists(settings.BASE_DIR))
@@ -0,0 +1,131 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Group, Post, User
+from posts import sitemaps
+from posts.sitemaps import (chunk_path, ensure_chunk, sitemap_chunks,
+                            write_chunk)
+from users.deletion import schedule_deletion
+
+TEMP_SITEMAP_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(
+    SITEMAP_ROOT=TEMP_SITEMAP_ROOT, SITEMAP_BASE_URL='http://testserver'
+)
+@mock.patch('posts.sitemaps.CHUNK_SIZE', 3)
+class SitemapTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='leo')
+        Group.objects.create(title='Группа', slug='group')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_SITEMAP_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.posts = [
+            Post.objects.create(author=self.author, text=f'Пост {i}')
+            for i in range(7)
+        ]
+
+    def post_chunk(self, post):
+        return 'posts', post.pk // 3
+
+    def test_index_lists_chunks(self):
+        response = self.client.get(reverse('posts:sitemap'))
+        for section, number in sitemap_chunks():
+            self.assertContains(
+                response,
+                f'http://testserver/sitemap-{section}-{number}.xml',
+            )
+
+    def test_chunk_lists_urls(self):
+        post = self.posts[0]
+        section, number = self.post_chunk(post)
+        response = self.client.get(reverse(
+            'posts:sitemap_chunk',
+            kwargs={'section': section, 'number': number},
+        ))
+        content = b''.join(response.streaming_content).decode()
+        self.assertIn(f'http://testserver/posts/{post.pk}/', content)
+        self.assertLessEqual(content.count('<url>'), 3)
+
+    def test_only_changed_chunk_rebuilt(self):
+        """Правка поста пересобирает только его кусок."""
+        call_command('build_sitemaps', stdout=StringIO())
+        post = self.posts[-1]
+        post.text = 'Новый текст'
+        post.save()
+        out = StringIO()
+        call_command('build_sitemaps', stdout=out)
+        self.assertIn('Пересобрано кусков: 1', out.getvalue())
+        self.assertFalse(ensure_chunk(*self.post_chunk(post))[1])
+
+    def test_deleted_post_leaves_chunk(self):
+        post = self.posts[0]
+        path, _ = ensure_chunk(*self.post_chunk(post))
+        post.soft_delete()
+        path, rebuilt = ensure_chunk(*self.post_chunk(post))
+        self.assertTrue(rebuilt)
+        with open(path, encoding='utf-8') as sitemap:
+            self.assertNotIn(f'/posts/{post.pk}/', sitemap.read())
+
+    def test_chunk_outside_index(self):
+        """Номер за пределами индекса — 404 без файла на диске."""
+        number = max(number for _, number in sitemap_chunks()) + 1
+        response = self.client.get(reverse(
+            'posts:sitemap_chunk',
+            kwargs={'section': 'posts', 'number': number},
+        ))
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(os.path.exists(chunk_path('posts', number)))
+
+    def test_deleted_author_leaves_chunks(self):
+        ensure_chunk(*self.post_chunk(self.posts[0]))
+        schedule_deletion(self.author, background=False)
+        path, rebuilt = ensure_chunk(*self.post_chunk(self.posts[0]))
+        self.assertTrue(rebuilt)
+        with open(path, encoding='utf-8') as sitemap:
+            self.assertNotIn(f'/posts/{self.posts[0].pk}/', sitemap.read())
+
+    def test_concurrent_writers_use_own_temp_files(self):
+        """Два запроса собирают один кусок одновременно — оба успешны."""
+        group_urls = sitemaps.URL_SOURCES['groups']
+
+        def urls_with_second_writer(number):
+            # второй поток того же процесса пишет кусок, пока идёт первый
+            sitemaps.URL_SOURCES['groups'] = group_urls
+            write_chunk('groups', number, 1)
+            return group_urls(number)
+
+        with mock.patch.dict(
+            sitemaps.URL_SOURCES, {'groups': urls_with_second_writer}
+        ):
+            write_chunk('groups', 0, 1)
+        path = chunk_path('groups', 0)
+        self.assertEqual(os.stat(path).st_mode & 0o777, sitemaps.FILE_MODE)
+        self.assertEqual(
+            [name for name in os.listdir(TEMP_SITEMAP_ROOT)
+             if name.endswith('.tmp')],
+            [],
+        )
+
+    def test_unknown_section(self):
+        response = self.client.get(reverse(
+            'posts:sitemap_chunk', kwargs={'section': 'x', 'number': 0}
+        ))
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,58 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.models import Comment, Post, User
+
+
+class SoftDeleteTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='leo')
+
+    def setUp(self):
+        cache.clear()
+        self.post = Post.objects.create(author=self.user, text='Война и мир')
+        self.comment = Comment.objects.create(
+            post=self.post, author=self.user, text='Комментарий'
+        )
+
+    def test_soft_deleted_post_hidden(self):
+        """Удалённый пост пропадает из менеджеров и страниц."""
+        profile = reverse('posts:profile', kwargs={'username': 'leo'})
+        self.assertContains(self.client.get(profile), 'Война и мир')
+        self.post.soft_delete()
+        self.assertFalse(Post.objects.exists())
+        self.assertFalse(self.user.posts.exists())
+        self.assertTrue(Post.all_objects.filter(pk=self.post.pk).exists())
+        self.assertNotContains(self.client.get(profile), 'Война и мир')
+        detail = reverse(
+            'posts:post_detail', kwargs={'post_id': self.post.pk}
+        )
+        self.assertEqual(self.client.get(detail).status_code, 404)
+
+    def test_soft_deleted_comment_hidden(self):
+        self.comment.soft_delete()
+        self.assertFalse(self.post.comments.exists())
+        detail = reverse(
+            'posts:post_detail', kwargs={'post_id': self.post.pk}
+        )
+        self.assertNotContains(self.client.get(detail), 'Комментарий')
+
+    def test_purge_deletes_expired_rows(self):
+        """purge_deleted удаляет только строки старше срока хранения."""
+        fresh = Post.objects.create(author=self.user, text='Свежий')
+        fresh.soft_delete()
+        expired = timezone.now() - timedelta(days=31)
+        Post.objects.filter(pk=self.post.pk).update(deleted_at=expired)
+        out = StringIO()
+        call_command('purge_deleted', days=30, stdout=out)
+        self.assertIn('Удалено постов: 1', out.getvalue())
+        self.assertEqual(list(Post.all_objects.all()), [fresh])
+        self.assertFalse(Comment.all_objects.exists())
@@ -0,0 +1,98 @@
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.models import Follow, Group, GroupFollow, Post, User
+from posts.timeline import decode_cursor, merge_timeline, timeline_streams
+
+
+class TimelineTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='leo')
+        cls.stranger = User.objects.create_user(username='stranger')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        GroupFollow.objects.create(user=cls.reader, group=cls.group)
+        start = timezone.now() - timedelta(days=1)
+        specs = [
+            (cls.author, None),
+            (cls.stranger, cls.group),
+            # избранный автор в подписанной группе — в двух потоках
+            (cls.author, cls.group),
+            (cls.stranger, None),
+        ] * 4
+        cls.posts = []
+        for minute, (author, group) in enumerate(specs):
+            post = Post.objects.create(author=author, group=group, text='П')
+            Post.objects.filter(pk=post.pk).update(
+                pub_date=start + timedelta(minutes=minute)
+            )
+            cls.posts.append(post)
+        cls.expected = [
+            post.pk for post, (author, group) in zip(cls.posts, specs)
+            if author == cls.author or group == cls.group
+        ][::-1]
+
+    def setUp(self):
+        cache.clear()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def test_merge_pages_by_cursor(self):
+        """Слияние потоков: по убыванию даты, без дублей и пропусков."""
+        streams = timeline_streams(self.reader)
+        seen, cursor = [], None
+        while True:
+            page, next_cursor = merge_timeline(
+                streams, decode_cursor(cursor), limit=5
+            )
+            seen.extend(card.pk for card in page)
+            if next_cursor is None:
+                break
+            cursor = next_cursor
+        self.assertEqual(seen, self.expected)
+
+    def test_one_query_per_stream(self):
+        streams = timeline_streams(self.reader)
+        with self.assertNumQueries(len(streams)):
+            merge_timeline(streams, limit=5)
+
+    def test_timeline_view(self):
+        url = reverse('posts:timeline')
+        response = self.reader_client.get(url)
+        self.assertEqual(
+            [card.pk for card in response.context['posts']],
+            self.expected[:10],
+        )
+        cursor = response.context['next_cursor']
+        response = self.reader_client.get(url, {'cursor': cursor})
+        self.assertEqual(
+            [card.pk for card in response.context['posts']],
+            self.expected[10:],
+        )
+        self.assertIsNone(response.context['next_cursor'])
+
+    def test_group_follow(self):
+        url = reverse('posts:group_list', kwargs={'slug': 'group'})
+        self.reader_client.get(
+            reverse('posts:group_unfollow', kwargs={'slug': 'group'})
+        )
+        self.assertFalse(GroupFollow.objects.exists())
+        self.assertContains(
+            self.reader_client.get(url),
+            reverse('posts:group_follow', kwargs={'slug': 'group'}),
+        )
+        self.reader_client.get(
+            reverse('posts:group_follow', kwargs={'slug': 'group'})
+        )
+        self.assertTrue(
+            GroupFollow.objects.filter(
+                user=self.reader, group=self.group
+            ).exists()
+        )
@@ -0,0 +1,144 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import (SimpleTestCase, TestCase, TransactionTestCase,
+                         override_settings)
+
+from posts.models import Comment, Follow, Group, Post, User
+from posts.warmup import warm_up, warmup_paths
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+# кэш страниц, который переживает процесс команды, как memcached
+SHARED_CACHES = {
+    **settings.CACHES,
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(TEMP_MEDIA_ROOT, 'cache'),
+    },
+}
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+class WarmupPathsTest(TestCase):
+    def test_paths_ranked_by_popularity(self):
+        quiet, popular = (
+            User.objects.create_user(username=name)
+            for name in ('quiet', 'popular')
+        )
+        small, big = (
+            Group.objects.create(title=slug, slug=slug, description='')
+            for slug in ('small', 'big')
+        )
+        Follow.objects.create(user=quiet, author=popular)
+        Post.objects.create(author=quiet, text='Тихий', group=small)
+        discussed = Post.objects.create(author=popular, text='Обсуждаемый')
+        for _ in range(2):
+            latest = Post.objects.create(
+                author=popular, text='Пост', group=big
+            )
+        Comment.objects.create(post=discussed, author=quiet, text='Да')
+        self.assertEqual(warmup_paths(2, 1, 1, 2), [
+            '/', '/?page=2',
+            '/group/big/', '/group/big/?page=2',
+            '/profile/popular/', '/profile/popular/?page=2',
+            f'/posts/{discussed.pk}/', f'/posts/{latest.pk}/',
+        ])
+
+
+class WarmUpPoolTest(SimpleTestCase):
+    def test_concurrency_is_bounded(self):
+        active = []
+        peak = []
+        lock = threading.Lock()
+
+        def job():
+            with lock:
+                active.append(1)
+                peak.append(len(active))
+            time.sleep(0.01)
+            with lock:
+                active.pop()
+            return 'ok'
+
+        results = list(warm_up([(str(i), job) for i in range(8)], 2))
+        self.assertEqual([name for name, _, _ in results],
+                         [str(i) for i in range(8)])
+        self.assertEqual({result for _, result, _ in results}, {'ok'})
+        self.assertLessEqual(max(peak), 2)
+
+    def test_errors_are_returned(self):
+        def job():
+            raise ValueError('сломалось')
+
+        ((name, result, _),) = warm_up([('job', job)], 1)
+        self.assertIsInstance(result, ValueError)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, CACHES=SHARED_CACHES)
+class WarmCachesCommandTest(TransactionTestCase):
+    # задачи идут в своих потоках и видят только закоммиченные данные
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='leo')
+        self.post = Post.objects.create(
+            author=self.author, text='Картинка',
+            image=SimpleUploadedFile('small.gif', SMALL_GIF, 'image/gif'),
+        )
+
+    def test_pages_cached_and_thumbnails_made(self):
+        out = StringIO()
+        with mock.patch('sorl.thumbnail.get_thumbnail') as get_thumbnail:
+            call_command('warm_caches', concurrency=3, stdout=out)
+        self.assertIn('ошибок 0', out.getvalue())
+        get_thumbnail.assert_called_once_with(
+            self.post.image.name, '960x339', crop='center', upscale=True
+        )
+        with mock.patch('posts.views.index') as index:
+            response = self.client.get('/')
+        # первая страница уже в кэше страниц, вьюха не вызывается
+        index.assert_not_called()
+        self.assertContains(response, 'Картинка')
+
+    def test_failed_pages_reported(self):
+        out, err = StringIO(), StringIO()
+        with mock.patch('posts.management.commands.warm_caches.'
+                        'warmup_paths', return_value=['/', '/missing/']), \
+                mock.patch('sorl.thumbnail.get_thumbnail'):
+            call_command('warm_caches', stdout=out, stderr=err)
+        self.assertIn('/missing/: ответ 404', err.getvalue())
+        self.assertIn('Прогрето 2 из 3, ошибок 1', out.getvalue())
+
+    @override_settings(CACHES=settings.CACHES)
+    def test_pages_skipped_with_process_local_cache(self):
+        """LocMem команды пропадёт с ней: страницы не запрашиваются,
+        миниатюры делаются."""
+        out, err = StringIO(), StringIO()
+        with mock.patch('posts.warmup.Fetcher.__call__') as fetch, \
+                mock.patch('sorl.thumbnail.get_thumbnail') as get_thumbnail:
+            call_command('warm_caches', stdout=out, stderr=err)
+        fetch.assert_not_called()
+        get_thumbnail.assert_called_once()
+        self.assertIn('Страницы не прогреты', err.getvalue())
+        self.assertIn('Прогрето 1 из 1, ошибок 0', out.getvalue())
@@ -0,0 +1,82 @@
+"""
+Домашняя лента: посты избранных авторов и групп, на которые подписан
+пользователь, в одном потоке.
+
+Вместо одного запроса с OR по всем авторам и группам каждый поток
+(автор или группа) выбирается отдельно по своему частичному индексу —
+не больше limit + 1 постов после курсора, — а потоки сливаются кучей
+(heapq.merge) по (pub_date, pk). Пост избранного автора в подписанной
+группе приходит из двух потоков подряд и показывается один раз.
+Страницы листаются курсором: (pub_date, pk) последнего показанного поста.
+"""
+import heapq
+from datetime import datetime, timedelta, timezone
+
+from django.db.models import Q
+
+from .cards import post_cards
+from .models import Follow, GroupFollow, Post
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+MICROSECOND = timedelta(microseconds=1)
+
+
+def encode_cursor(card) -> str:
+    return f'{(card.pub_date - EPOCH) // MICROSECOND}_{card.pk}'
+
+
+def decode_cursor(value):
+    """(pub_date, pk) из строки курсора, None — для первой страницы."""
+    try:
+        micros, pk = (int(part) for part in value.split('_'))
+    except (AttributeError, ValueError):
+        return None
+    return EPOCH + micros * MICROSECOND, pk
+
+
+def sort_key(card):
+    return card.pub_date, card.pk
+
+
+def timeline_streams(user):
+    """Наборы постов, из которых складывается лента пользователя."""
+    posts = Post.objects.filter(author__is_active=True)
+    authors = Follow.objects.filter(user=user).values_list(
+        'author_id', flat=True
+    )
+    groups = GroupFollow.objects.filter(user=user).values_list(
+        'group_id', flat=True
+    )
+    return (
+        [posts.filter(author_id=pk) for pk in authors]
+        + [posts.filter(group_id=pk) for pk in groups]
+    )
+
+
+def read_stream(posts, cursor, limit):
+    if cursor is not None:
+        pub_date, pk = cursor
+        posts = posts.filter(
+            Q(pub_date__lt=pub_date) | Q(pub_date=pub_date, pk__lt=pk)
+        )
+    return post_cards(posts.order_by('-pub_date', '-pk'))[:limit]
+
+
+def merge_timeline(streams, cursor=None, limit=10):
+    """
+    Страница ленты из отсортированных потоков и курсор следующей
+    страницы (None, если она последняя).
+    """
+    merged = heapq.merge(
+        *(read_stream(posts, cursor, limit + 1) for posts in streams),
+        key=sort_key, reverse=True,
+    )
+    page = []
+    for card in merged:
+        # одинаковые посты из разных потоков идут в слиянии подряд
+        if page and page[-1].pk == card.pk:
+            continue
+        page.append(card)
+        if len(page) > limit:
+            return page[:limit], encode_cursor(page[limit - 1])
+    return page, None
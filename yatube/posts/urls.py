@@ -1,6 +1,6 @@
 from django.urls import path
 
-from . import views
+from . import feeds, views
 
 app_name = 'posts'
 
@@ -17,6 +17,17 @@ urlpatterns = [
         name='add_comment'
     ),
     path('follow/', views.follow_index, name='follow_index'),
+    path('timeline/', views.timeline, name='timeline'),
+    path(
+        'group/<slug:slug>/follow/',
+        views.group_follow,
+        name='group_follow'
+    ),
+    path(
+        'group/<slug:slug>/unfollow/',
+        views.group_unfollow,
+        name='group_unfollow'
+    ),
     path(
         'profile/<str:username>/follow/',
         views.profile_follow,
@@ -27,4 +38,32 @@ urlpatterns = [
         views.profile_unfollow,
         name="profile_unfollow"
     ),
+    path('sitemap.xml', views.sitemap, name='sitemap'),
+    path(
+        'sitemap-<str:section>-<int:number>.xml',
+        views.sitemap_chunk,
+        name='sitemap_chunk'
+    ),
+    path('feeds/rss/', feeds.LatestPostsFeed(), name='feed_rss'),
+    path('feeds/atom/', feeds.LatestPostsAtomFeed(), name='feed_atom'),
+    path(
+        'feeds/group/<slug:slug>/rss/',
+        feeds.GroupPostsFeed(),
+        name='group_feed_rss'
+    ),
+    path(
+        'feeds/group/<slug:slug>/atom/',
+        feeds.GroupPostsAtomFeed(),
+        name='group_feed_atom'
+    ),
+    path(
+        'feeds/profile/<str:username>/rss/',
+        feeds.AuthorPostsFeed(),
+        name='profile_feed_rss'
+    ),
+    path(
+        'feeds/profile/<str:username>/atom/',
+        feeds.AuthorPostsAtomFeed(),
+        name='profile_feed_atom'
+    ),
 ]
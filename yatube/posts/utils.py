@@ -1,16 +1,137 @@
-from django.core.paginator import Page, Paginator
-from django.db.models import QuerySet
+from django.core.cache import caches
+from django.core.paginator import EmptyPage, Page, Paginator
+from django.db.models import Max, QuerySet
 from django.core.handlers.wsgi import WSGIRequest
+from django.utils.functional import cached_property
+
+from .cache import get_version
+
+# дальше точный COUNT(*) не считаем, показываем оценку
+ESTIMATE_THRESHOLD = 10000
+COUNT_CACHE_TIMEOUT = 60 * 5
+
+
+class LookaheadPage(Page):
+    """
+    Страница ленты с оценённым размером: есть ли следующая, известно
+    по лишнему объекту, выбранному вместе со страницей, а не по num_pages.
+    """
+
+    def __init__(self, object_list, number, paginator, has_more):
+        super().__init__(object_list, number, paginator)
+        self.has_more = has_more
+
+    def has_next(self):
+        return self.has_more
+
+
+class CachedCountPaginator(Paginator):
+    """
+    Paginator, который берёт число объектов из кэша набора постов feed
+    ('index', 'author:<id>', 'group:<id>'). Ключ включает версию набора,
+    поэтому новый или удалённый пост сразу сбрасывает счётчик.
+    Большие наборы не считаются целиком: вместо точного числа —
+    оценка и флаг is_estimated для шаблона. Для таких наборов страницы
+    не перечисляются, а ссылка «Следующая» есть, пока за страницей есть
+    посты (LookaheadPage). Если оценка — лишь порог (is_lower_bound),
+    число страниц не показывается совсем.
+
+    estimate_by_pk — набор отличается от всей таблицы только скрытыми
+    постами (удалённые, скрытые авторы), и max(pk) — честная оценка
+    даже при фильтрах в запросе.
+    """
+
+    def __init__(self, object_list, per_page, feed=None,
+                 estimate_by_pk=False, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.feed = feed
+        self.estimate_by_pk = estimate_by_pk
+        self.is_estimated = False
+
+    @cached_property
+    def count(self):
+        if self.feed is None:
+            count, self.is_estimated = self.compute_count()
+            return count
+        key = f'posts:count:{self.feed}:{get_version(self.feed)}'
+        cached = caches['tiered'].get(key)
+        if cached is None:
+            cached = self.compute_count()
+            caches['tiered'].set(key, cached, COUNT_CACHE_TIMEOUT)
+        count, self.is_estimated = cached
+        return count
+
+    @cached_property
+    def exact_count(self):
+        """
+        Точное число объектов для подписи вроде «Всего постов». Если count
+        — оценка, делается полный COUNT(*), но раз на версию набора.
+        """
+        if not self.count or not self.is_estimated:
+            return self.count
+        if self.feed is None:
+            return self.object_list.count()
+        key = f'posts:exact_count:{self.feed}:{get_version(self.feed)}'
+        count = caches['tiered'].get(key)
+        if count is None:
+            count = self.object_list.count()
+            caches['tiered'].set(key, count, COUNT_CACHE_TIMEOUT)
+        return count
+
+    @property
+    def is_lower_bound(self):
+        """count — только нижняя граница ESTIMATE_THRESHOLD + 1."""
+        return self.is_estimated and self.count == ESTIMATE_THRESHOLD + 1
+
+    def compute_count(self):
+        # COUNT по подзапросу с LIMIT не обходит всю таблицу
+        count = self.object_list[:ESTIMATE_THRESHOLD + 1].count()
+        if count <= ESTIMATE_THRESHOLD:
+            return count, False
+        return self.estimate_count(), True
+
+    def estimate_count(self):
+        if self.object_list.query.where and not self.estimate_by_pk:
+            # для отфильтрованной ленты знаем только нижнюю границу
+            return ESTIMATE_THRESHOLD + 1
+        # без фильтров max(pk) берётся из индекса и близок к числу строк
+        pk_max = self.object_list.aggregate(pk_max=Max('pk'))['pk_max']
+        return max(pk_max or 0, ESTIMATE_THRESHOLD + 1)
+
+    def page(self, number):
+        number = self.validate_number(number)
+        if not self.is_estimated:
+            return super().page(number)
+        bottom = (number - 1) * self.per_page
+        objects = list(self.object_list[bottom:bottom + self.per_page + 1])
+        return LookaheadPage(
+            objects[:self.per_page], number, self,
+            has_more=len(objects) > self.per_page,
+        )
+
+    def validate_number(self, number):
+        try:
+            return super().validate_number(number)
+        except EmptyPage:
+            # при оценке последняя страница неизвестна, пустая страница
+            # за ней лучше, чем перенос на «последнюю»
+            if self.is_estimated and int(number) > 1:
+                return int(number)
+            raise
 
 
 def get_page_pagi_func(
     request: WSGIRequest,
     objects: QuerySet,
-    posts_on_page: int
+    posts_on_page: int,
+    feed: str = None,
+    estimate_by_pk: bool = False
 ) -> Page:
     """
     функция пагинации для views, вынесена в отдельный модуль
     """
-    paginator = Paginator(objects, posts_on_page)
+    paginator = CachedCountPaginator(
+        objects, posts_on_page, feed=feed, estimate_by_pk=estimate_by_pk
+    )
     page_number = request.GET.get('page')
     return paginator.get_page(page_number)
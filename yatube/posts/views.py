@@ -1,17 +1,29 @@
+from django.http import FileResponse, Http404, HttpResponse
 from django.shortcuts import render, get_object_or_404, redirect
+from core.media import clean_path, send_file
+from .cache import versions
+from .cards import post_cards
+from .catalogue import get_group_or_404
 from .forms import CommentForm, PostForm
-from .models import Follow, Group, Post, User
+from .models import Follow, GroupFollow, Post, User
+from .sitemaps import ensure_chunk, sitemap_chunks, sitemap_index
+from .timeline import decode_cursor, merge_timeline, timeline_streams
 from .utils import get_page_pagi_func
 from django.contrib.auth.decorators import login_required
 
 
 COUNT_OF_POSTS = 10
 COP_MAIN_PAGE = 17
+# превью sorl-thumbnail доступны всем, как и сами картинки постов
+PUBLIC_MEDIA_PREFIXES = ('cache/',)
 
 
 def index(request):
-    post_list = Post.objects.select_related('group').all()
-    page_obj = get_page_pagi_func(request, post_list, COUNT_OF_POSTS)
+    post_list = post_cards(Post.objects.filter(author__is_active=True))
+    # фильтры ленты скрывают лишь малую долю постов: оценка по max(pk)
+    page_obj = get_page_pagi_func(
+        request, post_list, COUNT_OF_POSTS, feed='index', estimate_by_pk=True
+    )
     context = {
         'page_obj': page_obj,
     }
@@ -19,20 +31,38 @@ def index(request):
 
 
 def group_posts(request, slug):
-    group = get_object_or_404(Group, slug=slug)
-    posts = group.groups.all()
-    page_obj = get_page_pagi_func(request, posts, COUNT_OF_POSTS)
+    # группа и ссылки на группы в карточках берутся из каталога
+    group = get_group_or_404(slug)
+    posts = post_cards(
+        Post.objects.filter(group_id=group.id, author__is_active=True)
+    )
+    page_obj = get_page_pagi_func(
+        request, posts, COUNT_OF_POSTS, feed=f'group:{group.pk}'
+    )
+    group_following = (
+        request.user.is_authenticated
+        and GroupFollow.objects.filter(
+            user=request.user, group_id=group.id
+        ).exists()
+    )
     context = {
         'group': group,
         'page_obj': page_obj,
+        'group_following': group_following,
+        # версия группы растёт, когда пост входит в группу,
+        # уходит из неё или правится
+        'cache_version': versions(f'group:{group.pk}'),
     }
     return render(request, 'posts/group_list.html', context)
 
 
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    posts = author.posts.select_related('group')
-    page_obj = get_page_pagi_func(request, posts, COUNT_OF_POSTS)
+    # аккаунт, поставленный на удаление, скрыт сразу
+    author = get_object_or_404(User, username=username, is_active=True)
+    posts = post_cards(author.posts.all())
+    page_obj = get_page_pagi_func(
+        request, posts, COUNT_OF_POSTS, feed=f'author:{author.pk}'
+    )
     following = (request.user.is_authenticated and Follow.objects.filter(
         user=request.user,
         author=author).exists()
@@ -41,14 +71,16 @@ def profile(request, username):
         'author': author,
         'page_obj': page_obj,
         'following': following,
+        # ключ кэша списка постов: меняется при правке постов автора
+        'cache_version': versions(f'author:{author.pk}', 'groups'),
     }
     return render(request, 'posts/profile.html', context)
 
 
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
+    post = get_object_or_404(Post, id=post_id, author__is_active=True)
     form = CommentForm()
-    comments = post.comments.all()
+    comments = post.comments.filter(author__is_active=True)
     context = {
         'post_id': post_id,
         'post': post,
@@ -106,7 +138,11 @@ def add_comment(request, post_id):
 
 @login_required
 def follow_index(request):
-    post_list = Post.objects.filter(author__following__user=request.user)
+    post_list = post_cards(
+        Post.objects.filter(
+            author__following__user=request.user, author__is_active=True
+        )
+    )
     page_obj = get_page_pagi_func(request, post_list, COUNT_OF_POSTS)
     context = {
         'page_obj': page_obj,
@@ -114,6 +150,20 @@ def follow_index(request):
     return render(request, 'posts/follow.html', context)
 
 
+@login_required
+def timeline(request):
+    posts, next_cursor = merge_timeline(
+        timeline_streams(request.user),
+        decode_cursor(request.GET.get('cursor')),
+        COUNT_OF_POSTS,
+    )
+    context = {
+        'posts': posts,
+        'next_cursor': next_cursor,
+    }
+    return render(request, 'posts/timeline.html', context)
+
+
 @login_required
 def profile_follow(request, username):
     author = get_object_or_404(User, username=username)
@@ -128,3 +178,41 @@ def profile_unfollow(request, username):
     if Follow.objects.filter(user=request.user, author=author).exists():
         Follow.objects.filter(user=request.user, author=author).delete()
     return redirect('posts:profile', username=username)
+
+
+@login_required
+def group_follow(request, slug):
+    group = get_group_or_404(slug)
+    GroupFollow.objects.get_or_create(user=request.user, group_id=group.id)
+    return redirect('posts:group_list', slug=slug)
+
+
+@login_required
+def group_unfollow(request, slug):
+    group = get_group_or_404(slug)
+    GroupFollow.objects.filter(user=request.user, group_id=group.id).delete()
+    return redirect('posts:group_list', slug=slug)
+
+
+def media(request, path):
+    """Картинки отдаём только у существующих постов, превью — всем."""
+    path = clean_path(path)
+    if (
+        path.startswith(PUBLIC_MEDIA_PREFIXES)
+        or Post.objects.filter(image=path, author__is_active=True).exists()
+    ):
+        return send_file(request, path)
+    raise Http404
+
+
+def sitemap(request):
+    return HttpResponse(sitemap_index(), content_type='application/xml')
+
+
+def sitemap_chunk(request, section, number):
+    # файл пишется только для кусков из индекса, иначе диск забьют
+    # запросами с произвольными номерами
+    if (section, number) not in sitemap_chunks():
+        raise Http404
+    path, _ = ensure_chunk(section, number)
+    return FileResponse(open(path, 'rb'), content_type='application/xml')
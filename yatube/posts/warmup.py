@@ -0,0 +1,145 @@
+"""
+Прогрев кэшей после выкладки.
+
+Сразу после деплоя пусты кэш страниц, общий уровень кэша 'tiered'
+(каталог групп, счётчики, карточки) и хранилище ключей sorl — первые
+минуты трафика уходят в БД. Команда warm_caches заранее запрашивает
+страницы, которые чаще всего нужны гостям, и делает недостающие миниатюры:
+  первые страницы index, первые страницы самых больших групп,
+  профили авторов с наибольшим числом подписчиков,
+  посты с наибольшим числом комментариев.
+Счётчиков просмотров в проекте нет, поэтому «популярность» оценивается
+по подписчикам и комментариям.
+
+Страницы запрашиваются либо внутри процесса (django.test.Client через весь
+стек middleware), либо по HTTP у работающего сайта (base_url). Внутри
+процесса прогрев имеет смысл только с общим кэшем default (memcached):
+LocMem команды пропадёт вместе с ней, и тогда страницы без base_url не
+запрашиваются. По HTTP каждый запрос попадает в один воркер: общий кэш
+прогревается целиком, а локальные LRU уровня 'tiered' — только у
+ответивших воркеров. Миниатюры делаются внутри процесса всегда: sorl
+хранит их ключи в БД, а файлы — в MEDIA_ROOT.
+Задачи выполняются пулом из concurrency потоков.
+"""
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Count, Q
+from django.urls import reverse
+
+from .models import Group, Post, User
+
+# как в шаблонах карточек: {% thumbnail post.image "960x339" ... %}
+THUMBNAIL_GEOMETRY = '960x339'
+THUMBNAIL_OPTIONS = {'crop': 'center', 'upscale': True}
+REQUEST_TIMEOUT = 30
+
+
+def page_paths(path, pages):
+    return [path] + [f'{path}?page={number}' for number in range(2, pages + 1)]
+
+
+def top_groups(limit):
+    return Group.objects.annotate(
+        live_posts=Count('groups', filter=Q(groups__deleted_at__isnull=True))
+    ).order_by('-live_posts', 'pk').values_list('slug', flat=True)[:limit]
+
+
+def top_profiles(limit):
+    return User.objects.filter(is_active=True).annotate(
+        followers=Count('following')
+    ).order_by('-followers', 'pk').values_list('username', flat=True)[:limit]
+
+
+def top_posts(limit):
+    return Post.objects.filter(author__is_active=True).annotate(
+        live_comments=Count(
+            'comments', filter=Q(comments__deleted_at__isnull=True)
+        )
+    ).order_by('-live_comments', '-pk').values_list('pk', flat=True)[:limit]
+
+
+def warmup_paths(pages, groups, profiles, posts):
+    """Пути в порядке важности: сначала лента, потом группы и авторы."""
+    paths = page_paths(reverse('posts:index'), pages)
+    for slug in top_groups(groups):
+        paths += page_paths(reverse('posts:group_list', args=[slug]), pages)
+    for username in top_profiles(profiles):
+        paths += page_paths(reverse('posts:profile', args=[username]), pages)
+    paths += [
+        reverse('posts:post_detail', args=[pk]) for pk in top_posts(posts)
+    ]
+    return paths
+
+
+def thumbnail_posts(limit):
+    """Свежие посты с картинкой — их миниатюры нужны первыми."""
+    return Post.objects.exclude(image='').filter(
+        author__is_active=True
+    ).order_by('-pk').values_list('pk', 'image')[:limit]
+
+
+class WarmupError(Exception):
+    pass
+
+
+class Fetcher:
+    """
+    Запрос страницы как гостем: внутри процесса или по HTTP. Ответ не 200
+    считается ошибкой прогрева.
+    """
+
+    def __init__(self, base_url=None):
+        self.base_url = base_url and base_url.rstrip('/')
+
+    def __call__(self, path):
+        if self.base_url:
+            with urllib.request.urlopen(
+                self.base_url + path, timeout=REQUEST_TIMEOUT
+            ) as response:
+                response.read()
+                return response.status
+        # django.test нужен только здесь, при старте воркера не грузим
+        from django.test import Client
+
+        client = Client(SERVER_NAME=settings.ALLOWED_HOSTS[0])
+        status = client.get(path).status_code
+        if status != 200:
+            raise WarmupError(f'ответ {status}')
+        return status
+
+
+def make_thumbnail(image):
+    from sorl.thumbnail import get_thumbnail
+
+    # из хранилища ключей, если миниатюра уже есть, иначе рисуется
+    return get_thumbnail(image, THUMBNAIL_GEOMETRY, **THUMBNAIL_OPTIONS)
+
+
+def run_job(job):
+    """(результат или исключение, секунды); соединение с БД — своё."""
+    started = time.perf_counter()
+    try:
+        result = job()
+    except Exception as error:
+        result = error
+    finally:
+        connection.close()
+    return result, time.perf_counter() - started
+
+
+def warm_up(jobs, concurrency):
+    """
+    jobs — пары (имя, вызов без аргументов). Отдаёт (имя, результат или
+    исключение, секунды) в порядке jobs; одновременно выполняется не
+    больше concurrency задач.
+    """
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = [
+            (name, pool.submit(run_job, job)) for name, job in jobs
+        ]
+        for name, future in futures:
+            yield (name, *future.result())
@@ -0,0 +1,41 @@
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+# импорт регистрирует UserAdmin: users стоит в INSTALLED_APPS раньше auth
+from django.contrib.auth.admin import UserAdmin
+
+from .deletion import schedule_deletion
+from .models import UserDeletion
+
+User = get_user_model()
+
+
+class UserDeletionAdmin(admin.ModelAdmin):
+    list_display = (
+        'username', 'stage', 'deleted_rows', 'created', 'finished',
+    )
+    readonly_fields = list_display + ('user_id',)
+
+
+class DeletingUserAdmin(UserAdmin):
+    """
+    Удаление пользователя — через users.deletion: аккаунт скрывается
+    сразу, а посты, комментарии и подписки удаляются пачками в фоне,
+    а не одним каскадом в транзакции. Ход удаления виден в UserDeletion.
+    """
+
+    def get_deleted_objects(self, objs, request):
+        # каскад не собираем: у автора с большой историей это тот же
+        # долгий обход, от которого уходит users.deletion
+        return [str(obj) for obj in objs], {}, set(), []
+
+    def delete_model(self, request, obj):
+        schedule_deletion(obj)
+
+    def delete_queryset(self, request, queryset):
+        for user in queryset:
+            schedule_deletion(user)
+
+
+admin.site.register(UserDeletion, UserDeletionAdmin)
+admin.site.unregister(User)
+admin.site.register(User, DeletingUserAdmin)
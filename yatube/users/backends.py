@@ -0,0 +1,32 @@
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+
+from core.cache import is_shared
+
+USER_CACHE_TIMEOUT = 60 * 15
+
+
+def user_cache_key(user_id):
+    return f'users:user:{user_id}'
+
+
+class CachedModelBackend(ModelBackend):
+    """
+    ModelBackend, который берёт пользователя для request.user из кэша.
+    Кэш сбрасывается в users.signals при любом сохранении пользователя
+    (смена пароля, профиля, last_login) и при удалении. Сброс должен
+    дойти до всех воркеров, поэтому с кэшем в памяти процесса (LocMem)
+    пользователь не кэшируется: иначе выход или блокировка в одном
+    воркере не касались бы остальных до USER_CACHE_TIMEOUT.
+    """
+
+    def get_user(self, user_id):
+        if not is_shared():
+            return super().get_user(user_id)
+        key = user_cache_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                cache.set(key, user, USER_CACHE_TIMEOUT)
+        return user
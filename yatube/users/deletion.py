@@ -0,0 +1,122 @@
+"""
+Удаление пользователя с большой историей по частям.
+
+Каскад on_delete=CASCADE удалил бы посты, комментарии и подписки одной
+транзакцией, надолго заперев SQLite. Здесь аккаунт сначала скрывается
+(is_active=False — профиль, посты и комментарии пропадают со страниц),
+а зависимые строки удаляются пачками по BATCH_SIZE, каждая пачка в своей
+транзакции. Прогресс пишется в UserDeletion, прерванное удаление
+продолжает команда delete_users --resume. Удаление пользователя в
+админке (users.admin) идёт тем же путём, в фоновом потоке.
+"""
+import threading
+
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from sorl.thumbnail import delete as delete_image
+
+from posts.cache import bump_version
+from posts.models import Comment, Follow, GroupFollow, Post
+from posts.prerender import prerender_posts_change
+from posts.sitemaps import chunk_scope
+
+from .models import UserDeletion
+
+User = get_user_model()
+
+BATCH_SIZE = 500
+
+
+def stages(user_id):
+    """Этапы удаления: сначала строки, которые ссылаются на посты."""
+    return (
+        ('comments', Comment.all_objects.filter(author_id=user_id)),
+        ('post_comments', Comment.all_objects.filter(
+            post__author_id=user_id
+        )),
+        ('follows', Follow.objects.filter(
+            Q(user_id=user_id) | Q(author_id=user_id)
+        )),
+        ('group_follows', GroupFollow.objects.filter(user_id=user_id)),
+        ('posts', Post.all_objects.filter(author_id=user_id)),
+    )
+
+
+def schedule_deletion(user, background=True) -> UserDeletion:
+    """Сразу скрывает аккаунт и ставит его удаление в очередь."""
+    with transaction.atomic():
+        user.is_active = False
+        user.save(update_fields=['is_active'])
+        deletion, _ = UserDeletion.objects.get_or_create(
+            user_id=user.pk, defaults={'username': user.username}
+        )
+    # посты автора пропадают из общих лент, из лент его групп и из
+    # кусков sitemap
+    scopes = {'index'}
+    group_ids = set()
+    for pk, group_id in Post.objects.filter(author_id=user.pk).values_list(
+        'pk', 'group_id'
+    ).iterator():
+        scopes.add(chunk_scope('posts', pk))
+        if group_id is not None:
+            group_ids.add(group_id)
+            scopes.add(f'group:{group_id}')
+    bump_version(*scopes)
+    prerender_posts_change({user.pk}, group_ids)
+    if background:
+        transaction.on_commit(lambda: start_deletion(deletion.pk))
+    return deletion
+
+
+def start_deletion(deletion_id):
+    thread = threading.Thread(
+        target=run_in_thread, args=(deletion_id,), daemon=True
+    )
+    thread.start()
+    return thread
+
+
+def run_in_thread(deletion_id):
+    try:
+        run_deletion(UserDeletion.objects.get(pk=deletion_id))
+    finally:
+        connection.close()
+
+
+def run_deletion(deletion, batch_size=BATCH_SIZE, progress=None):
+    """Удаляет всё, что принадлежит пользователю, и его самого."""
+    for stage, rows in stages(deletion.user_id):
+        set_progress(deletion, stage=stage)
+        while True:
+            deleted = delete_batch(rows, batch_size)
+            if not deleted:
+                break
+            set_progress(deletion, deleted_rows=F('deleted_rows') + deleted)
+            if progress is not None:
+                progress(deletion)
+    User.objects.filter(pk=deletion.user_id).delete()
+    set_progress(deletion, stage='done', finished=timezone.now())
+
+
+def set_progress(deletion, **fields):
+    UserDeletion.objects.filter(pk=deletion.pk).update(**fields)
+    deletion.refresh_from_db(fields=list(fields))
+
+
+def delete_batch(rows, batch_size):
+    pks = list(rows.values_list('pk', flat=True)[:batch_size])
+    if not pks:
+        return 0
+    batch = rows.filter(pk__in=pks)
+    images = []
+    if rows.model is Post:
+        images = [name for name in batch.values_list('image', flat=True)
+                  if name]
+    with transaction.atomic():
+        deleted, _ = batch.delete()
+    # файлы удаляем после коммита: откат не должен оставить пост без картинки
+    for name in images:
+        delete_image(name)
+    return deleted
@@ -0,0 +1,44 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from users.deletion import BATCH_SIZE, run_deletion, schedule_deletion
+from users.models import UserDeletion
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет пользователей с их постами, комментариями и подписками '
+        'пачками; --resume продолжает прерванные удаления.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('usernames', nargs='*')
+        parser.add_argument('--resume', action='store_true')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        deletions = []
+        for username in options['usernames']:
+            user = User.objects.filter(username=username).first()
+            if user is None:
+                raise CommandError(f'Нет пользователя {username}')
+            deletions.append(schedule_deletion(user, background=False))
+        if options['resume']:
+            deletions.extend(UserDeletion.objects.filter(
+                finished__isnull=True
+            ).exclude(pk__in=[deletion.pk for deletion in deletions]))
+        for deletion in deletions:
+            run_deletion(
+                deletion, options['batch_size'], progress=self.report
+            )
+            self.stdout.write(
+                f'{deletion.username}: удалено строк {deletion.deleted_rows}'
+            )
+
+    def report(self, deletion):
+        self.stdout.write(
+            f'  {deletion.username}: {deletion.stage}, '
+            f'удалено строк {deletion.deleted_rows}'
+        )
@@ -0,0 +1,22 @@
+from django.db import models
+
+
+class UserDeletion(models.Model):
+    """
+    Удаление пользователя по частям. Строка живёт, пока идёт удаление,
+    и показывает этап и число уже удалённых строк.
+    """
+    # не ForeignKey: пользователь удаляется последним шагом
+    user_id = models.PositiveIntegerField('id пользователя', unique=True)
+    username = models.CharField('Имя пользователя', max_length=150)
+    stage = models.CharField('Этап', max_length=20, default='pending')
+    deleted_rows = models.PositiveIntegerField('Удалено строк', default=0)
+    created = models.DateTimeField('Запрошено', auto_now_add=True)
+    finished = models.DateTimeField('Завершено', null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'Удаление пользователя'
+        verbose_name_plural = 'Удаления пользователей'
+
+    def __str__(self):
+        return f'Удаление {self.username}: {self.stage}'
@@ -0,0 +1,90 @@
+"""
+Сессии, которые читаются из кэша, а в БД пишутся после ответа.
+
+Создание сессии (вход, смена ключа) по-прежнему пишется в БД сразу —
+там проверяется уникальность ключа. Изменения уже существующей сессии
+внутри запроса сразу попадают в кэш, а запись в БД откладывается до
+request_finished: несколько сохранений за запрос склеиваются в одно,
+и ответ не ждёт запись в SQLite.
+"""
+import logging
+import threading
+
+from django.contrib.sessions.backends.cached_db import \
+    SessionStore as CachedDBStore
+from django.contrib.sessions.backends.base import UpdateError
+from django.contrib.sessions.backends.db import SessionStore as DBStore
+from django.core.signals import request_finished, request_started
+from django.db import DatabaseError
+
+from core.cache import is_shared
+
+logger = logging.getLogger(__name__)
+_state = threading.local()
+
+
+def _pending():
+    if not hasattr(_state, 'pending'):
+        _state.pending = {}
+    return _state.pending
+
+
+def start_request(**kwargs):
+    _state.in_request = True
+    _pending().clear()
+
+
+def flush_pending(**kwargs):
+    """Записывает в БД сессии, изменённые за запрос."""
+    _state.in_request = False
+    pending = _pending()
+    while pending:
+        _, store = pending.popitem()
+        try:
+            DBStore.save(store)
+        except UpdateError:
+            # сессию удалили другим запросом (выход в соседней вкладке) —
+            # запись в кэше из этого запроса не должна её воскресить
+            store._cache.delete(store.cache_key)
+        except DatabaseError:
+            # кэш уже содержит актуальные данные, при следующем
+            # изменении сессия запишется снова
+            logger.exception('Не удалось записать сессию в БД')
+
+
+request_started.connect(start_request)
+request_finished.connect(flush_pending)
+
+
+class SessionStore(CachedDBStore):
+    """
+    С кэшем в памяти процесса (LocMem) работает как обычное хранилище в
+    БД: выход в одном воркере не сбросил бы сессию в кэшах остальных.
+    """
+
+    def load(self):
+        if not is_shared():
+            return DBStore.load(self)
+        return super().load()
+
+    def exists(self, session_key):
+        if not is_shared():
+            return DBStore.exists(self, session_key)
+        return super().exists(session_key)
+
+    def save(self, must_create=False):
+        if not is_shared():
+            DBStore.save(self, must_create)
+            return
+        if must_create or not getattr(_state, 'in_request', False):
+            super().save(must_create)
+            return
+        if self.session_key is None:
+            self.create()
+            return
+        self._cache.set(self.cache_key, self._session, self.get_expiry_age())
+        _pending()[self.session_key] = self
+
+    def delete(self, session_key=None):
+        _pending().pop(session_key or self.session_key, None)
+        super().delete(session_key)
@@ -0,0 +1,257 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.signals import request_finished
+from django.http import HttpResponse
+from django.test import Client, TestCase, override_settings
+from django.urls import path, reverse
+
+from posts.models import Comment, Follow, Group, GroupFollow, Post
+
+from .backends import user_cache_key
+from .deletion import run_deletion, schedule_deletion
+from .models import UserDeletion
+from .sessions import SessionStore, flush_pending
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x01\x00\x01\x00\x00\x00\x00\x21'
+    b'\xf9\x04\x01\x0a\x00\x01\x00\x2c\x00\x00\x00\x00\x01\x00'
+    b'\x01\x00\x00\x02\x02\x4c\x01\x00\x3b'
+)
+
+
+def set_theme(request):
+    request.session['theme'] = 'dark'
+    return HttpResponse()
+
+
+def set_theme_before_logout(request):
+    response = set_theme(request)
+    # выход в соседней вкладке, пока этот запрос ещё идёт
+    SessionStore(request.session.session_key).delete()
+    return response
+
+
+urlpatterns = [
+    path('theme/', set_theme),
+    path('theme-before-logout/', set_theme_before_logout),
+]
+
+# файловый кэш общий для процессов, как memcached в проде
+SHARED_CACHES = {
+    **settings.CACHES,
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(TEMP_MEDIA_ROOT, 'cache'),
+    },
+}
+
+
+@override_settings(CACHES=SHARED_CACHES)
+class CachedAuthTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='HasNoName')
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_warm_request_skips_session_and_user_queries(self):
+        """Повторный запрос авторизованного юзера не ходит в БД
+        за сессией и пользователем (было 2 запроса)."""
+        url = reverse('about:author')
+        self.authorized_client.get(url)
+        with self.assertNumQueries(0):
+            response = self.authorized_client.get(url)
+        self.assertEqual(response.context['user'], self.user)
+
+    def test_user_cache_invalidated_on_save(self):
+        """Изменение профиля сразу видно в request.user."""
+        url = reverse('about:author')
+        self.authorized_client.get(url)
+        self.user.first_name = 'Лев'
+        self.user.save()
+        response = self.authorized_client.get(url)
+        self.assertEqual(response.context['user'].first_name, 'Лев')
+
+    def test_password_change_logs_out(self):
+        """После смены пароля старая сессия не пускает по кэшу."""
+        url = reverse('about:author')
+        self.authorized_client.get(url)
+        self.user.set_password('new-password-123')
+        self.user.save()
+        response = self.authorized_client.get(url)
+        self.assertFalse(response.context['user'].is_authenticated)
+
+    @override_settings(ROOT_URLCONF='users.tests')
+    def test_session_written_to_db_after_response(self):
+        """Изменения сессии за запрос пишутся в БД после ответа."""
+        session_key = self.authorized_client.session.session_key
+
+        def stored_theme():
+            return Session.objects.get(
+                session_key=session_key
+            ).get_decoded().get('theme')
+
+        at_response = []
+        # ставим проверку раньше flush_pending: ответ уже отдан, а запись
+        # в БД ещё не сделана
+        request_finished.disconnect(flush_pending)
+        request_finished.connect(
+            lambda **kwargs: at_response.append(stored_theme()),
+            weak=False, dispatch_uid='users.tests.at_response',
+        )
+        request_finished.connect(flush_pending)
+        self.addCleanup(
+            request_finished.disconnect,
+            dispatch_uid='users.tests.at_response',
+        )
+        self.authorized_client.get('/theme/')
+        self.assertEqual(at_response, [None])
+        self.assertEqual(stored_theme(), 'dark')
+        self.assertEqual(SessionStore(session_key)['theme'], 'dark')
+
+    @override_settings(ROOT_URLCONF='users.tests')
+    def test_session_deleted_during_request_stays_deleted(self):
+        """Отложенная запись не воскрешает сессию, удалённую выходом."""
+        session_key = self.authorized_client.session.session_key
+        self.authorized_client.get('/theme-before-logout/')
+        self.assertFalse(
+            Session.objects.filter(session_key=session_key).exists()
+        )
+        self.assertFalse(SessionStore().exists(session_key))
+
+
+class ProcessLocalCacheAuthTest(TestCase):
+    """С LocMem состояние входа не кэшируется: его сброс не виден
+    другим воркерам."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='HasNoName')
+        self.client.force_login(self.user)
+
+    def test_user_and_session_read_from_db(self):
+        url = reverse('about:author')
+        self.client.get(url)
+        with self.assertNumQueries(2):
+            self.client.get(url)
+        self.assertEqual(cache.get(user_cache_key(self.user.pk)), None)
+
+    def test_logout_elsewhere_ends_session(self):
+        url = reverse('about:author')
+        self.client.get(url)
+        # другой воркер удалил сессию из БД, его кэш сюда не доходит
+        Session.objects.all().delete()
+        response = self.client.get(url)
+        self.assertFalse(response.context['user'].is_authenticated)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class UserDeletionTest(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='leo')
+        self.reader = User.objects.create_user(username='reader')
+        self.posts = [
+            Post.objects.create(author=self.author, text=f'Пост {i}')
+            for i in range(5)
+        ]
+        self.image_post = Post.objects.create(
+            author=self.author,
+            text='Пост с картинкой',
+            image=SimpleUploadedFile('small.gif', SMALL_GIF, 'image/gif'),
+        )
+        self.reader_post = Post.objects.create(
+            author=self.reader, text='Пост читателя'
+        )
+        Comment.objects.create(
+            post=self.reader_post, author=self.author, text='Комментарий'
+        )
+        Comment.objects.create(
+            post=self.posts[0], author=self.reader, text='Ответ'
+        )
+        Follow.objects.create(user=self.reader, author=self.author)
+        GroupFollow.objects.create(
+            user=self.author,
+            group=Group.objects.create(title='Группа', slug='group'),
+        )
+
+    def test_account_hidden_immediately(self):
+        """До удаления строк профиль и посты аккаунта уже не видны."""
+        schedule_deletion(self.author, background=False)
+        profile = reverse('posts:profile', kwargs={'username': 'leo'})
+        self.assertEqual(self.client.get(profile).status_code, 404)
+        detail = reverse(
+            'posts:post_detail', kwargs={'post_id': self.posts[0].pk}
+        )
+        self.assertEqual(self.client.get(detail).status_code, 404)
+        self.assertNotContains(
+            self.client.get(reverse('posts:index')), 'Пост 1'
+        )
+        self.assertEqual(Post.objects.filter(author=self.author).count(), 6)
+
+    def test_batches_remove_everything(self):
+        """Пачки удаляют строки аккаунта, чужие остаются."""
+        image = os.path.join(TEMP_MEDIA_ROOT, self.image_post.image.name)
+        self.assertTrue(os.path.exists(image))
+        deletion = schedule_deletion(self.author, background=False)
+        batches = []
+        run_deletion(deletion, batch_size=2, progress=batches.append)
+        # 2 комментария, 1 подписка, 1 подписка на группу и 6 постов
+        # пачками по 2
+        self.assertEqual(len(batches), 7)
+        self.assertEqual(deletion.deleted_rows, 10)
+        self.assertEqual(deletion.stage, 'done')
+        self.assertIsNotNone(deletion.finished)
+        self.assertFalse(User.objects.filter(username='leo').exists())
+        self.assertFalse(Comment.objects.exists())
+        self.assertFalse(Follow.objects.exists())
+        self.assertFalse(GroupFollow.objects.exists())
+        self.assertEqual(list(Post.objects.all()), [self.reader_post])
+        self.assertFalse(os.path.exists(image))
+
+    def test_admin_delete_schedules_batched_deletion(self):
+        """Удаление в админке скрывает аккаунт и ставит удаление в
+        очередь, без каскада в запросе."""
+        admin = User.objects.create_superuser(
+            'admin', 'admin@example.com', 'password'
+        )
+        self.client.force_login(admin)
+        url = reverse('admin:auth_user_delete', args=[self.author.pk])
+        self.assertContains(self.client.get(url), 'leo')
+        with mock.patch('users.deletion.start_deletion') as start, \
+                mock.patch('users.deletion.transaction.on_commit',
+                           lambda callback: callback()):
+            response = self.client.post(url, {'post': 'yes'})
+        self.assertEqual(response.status_code, 302)
+        deletion = UserDeletion.objects.get(user_id=self.author.pk)
+        start.assert_called_once_with(deletion.pk)
+        self.author.refresh_from_db()
+        self.assertFalse(self.author.is_active)
+        self.assertEqual(Post.all_objects.filter(author=self.author).count(),
+                         6)
+
+    def test_command_resumes_unfinished(self):
+        schedule_deletion(self.author, background=False)
+        out = StringIO()
+        call_command('delete_users', resume=True, stdout=out)
+        self.assertIn('leo: удалено строк 10', out.getvalue())
+        self.assertIsNotNone(UserDeletion.objects.get().finished)
+        self.assertFalse(User.objects.filter(username='leo').exists())
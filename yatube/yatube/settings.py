@@ -32,6 +32,10 @@ ALLOWED_HOSTS = [
     'testserver',
 ]
 
+# сессии и request.user читаются из кэша, БД — только при промахе
+SESSION_ENGINE = 'users.sessions'
+AUTHENTICATION_BACKENDS = ['users.backends.CachedModelBackend']
+
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
 # LOGOUT_REDIRECT_URL = 'posts:index'
@@ -48,7 +52,9 @@ INSTALLED_APPS = [
     'posts.apps.PostsConfig',
     'core.apps.CoreConfig',
     'about.apps.AboutConfig',
-    'django.contrib.admin',
+    # без autodiscover при старте: админки грузятся вместе с URLconf,
+    # см. yatube/urls.py
+    'django.contrib.admin.apps.SimpleAdminConfig',
     'django.contrib.auth',
     'django.contrib.contenttypes',
     'django.contrib.sessions',
@@ -59,13 +65,33 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    # профилирует выбранные запросы целиком, см. core.middleware.profiler
+    'core.middleware.profiler.ProfilerMiddleware',
+    # медленные и повторяющиеся SQL-запросы со стеком, см. core.sql в логе
+    'core.middleware.query_log.QueryLogMiddleware',
+    # время рендера шаблонов и include, см. core.template_timing
+    'core.middleware.template_timing.TemplateTimingMiddleware',
+    # сжимает ответ последним, поэтому стоит выше всех, кто трогает тело
+    'core.middleware.compression.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    # последним: отдаёт готовую страницу гостю уже после разбора URL
+    'core.middleware.page_cache.AnonymousPageCacheMiddleware',
+]
+
+# вьюхи, чьи страницы для гостей целиком кэширует
+# core.middleware.page_cache, и функция версии контента для них
+PAGE_CACHE_VIEWS = [
+    'posts:index',
+    'posts:group_list',
+    'posts:profile',
+    'posts:post_detail',
 ]
+PAGE_CACHE_VERSION = 'posts.page_versions.page_version'
 
 ROOT_URLCONF = 'yatube.urls'
 
@@ -142,13 +168,77 @@ STATIC_URL = '/static/'
 
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
 
+# collectstatic складывает сюда файлы с хешем в имени и их .gz/.br копии,
+# отдаёт их core.static.StaticAssetsHandler из yatube/wsgi.py
+STATIC_ROOT = os.path.join(BASE_DIR, 'collected_static')
+
+STATICFILES_STORAGE = 'core.storage.CompressedManifestStaticFilesStorage'
+# STATIC_MANIFEST_STRICT=1 в окружении прода, где запускают collectstatic:
+# файл без записи в staticfiles.json — ошибка. Без него (dev, тесты)
+# вместо этого отдаётся исходное имя
+STATIC_MANIFEST_STRICT = os.environ.get('STATIC_MANIFEST_STRICT') == '1'
+
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Медиа отдаёт posts.views.media: Django проверяет доступ, а передачу файла
+# можно отдать фронтовому серверу. None — FileResponse из Django,
+# 'X-Accel-Redirect' — nginx (internal location на MEDIA_ACCEL_PREFIX),
+# 'X-Sendfile' — apache/lighttpd
+MEDIA_SENDFILE_HEADER = None
+MEDIA_ACCEL_PREFIX = '/protected-media/'
+
+# default должен быть общим для всех воркеров (memcached): через него
+# сбрасываются кэш пользователя и сессии, кэш страниц и версии. Без
+# MEMCACHED_LOCATION (dev, тесты) — LocMem одного процесса, и тогда
+# users.backends и users.sessions не кэшируют состояние входа.
+MEMCACHED_LOCATION = os.environ.get('MEMCACHED_LOCATION')
+
 CACHES = {
     'default': {
+        'BACKEND': 'django.core.cache.backends.memcached.MemcachedCache',
+        'LOCATION': MEMCACHED_LOCATION,
+    } if MEMCACHED_LOCATION else {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-    }
+    },
+    # LRU в памяти процесса перед default для мелких частых чтений
+    # (версии, счётчики, фрагменты лент), см. core.cache
+    'tiered': {
+        'BACKEND': 'core.cache.TieredCache',
+        'LOCATION': 'tiered',
+        'OPTIONS': {
+            'SHARED_ALIAS': 'default',
+            'LOCAL_TIMEOUT': 5,
+            'MAX_ENTRIES': 1000,
+        },
+    },
 }
 
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
+
+# мягко удалённые посты и комментарии purge_deleted удаляет насовсем
+# через столько дней
+SOFT_DELETE_RETENTION_DAYS = 30
+
+# куски sitemap пишутся на диск и могут раздаваться фронтовым сервером;
+# адреса в sitemap абсолютные, от SITEMAP_BASE_URL
+SITEMAP_ROOT = os.path.join(BASE_DIR, 'sitemaps')
+SITEMAP_BASE_URL = 'http://localhost:8000'
+
+# готовые страницы групп и профилей для файлового сервера (posts.prerender):
+# None — выключено, иначе каталог публикации
+PRERENDER_ROOT = None
+PRERENDER_PAGES = 3
+
+# профилирование живых запросов: доля случайных запросов (0 — только
+# по подписанному заголовку X-Profile), режим 'cprofile' или 'sampling',
+# каталог и сколько файлов хранить на каждую вьюху
+PROFILER_SAMPLE_RATE = 0
+PROFILER_MODE = 'sampling'
+PROFILER_ROOT = os.path.join(BASE_DIR, 'profiles')
+PROFILER_KEEP = 50
+
+# запросы к БД дольше порога (секунды) и одинаковые запросы, повторённые
+# за HTTP-запрос столько раз, пишутся в лог core.sql
+SLOW_QUERY_THRESHOLD = 0.1
+N_PLUS_ONE_THRESHOLD = 10
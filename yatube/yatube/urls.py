@@ -16,7 +16,13 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import include, path
 from django.conf import settings
-from django.conf.urls.static import static
+
+from core.views import metrics
+from posts.views import media
+
+# admin.py приложений импортируются здесь, при первом запросе, а не при
+# старте воркера (INSTALLED_APPS использует SimpleAdminConfig)
+admin.autodiscover()
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -24,14 +30,15 @@ urlpatterns = [
     path('auth/', include('users.urls')),
     path('auth/', include('django.contrib.auth.urls')),
     path('about/', include('about.urls', namespace='about')),
+    path('metrics/', metrics, name='metrics'),
+    path(
+        f'{settings.MEDIA_URL.lstrip("/")}<path:path>',
+        media,
+        name='media'
+    ),
 ]
 
 handler403 = 'core.views.permission_denied'
 handler404 = 'core.views.page_not_found'
 handler404csrf = 'core.views.csrf_failure'
 handler500 = 'core.views.server_error'
-
-if settings.DEBUG:
-    urlpatterns += static(
-        settings.MEDIA_URL, document_root=settings.MEDIA_ROOT
-    )